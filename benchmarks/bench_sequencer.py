@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Compare the counts-based difficulty sequencer with the original random.sample/list.remove loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_sequencer.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hdmtask.schedule import difficulty_pools, generate_switch_trials, longest_run, sequence_difficulties  # noqa: E402
+
+TRIAL_COUNTS = (80, 1000, 10000)
+
+
+def legacy_sequence_difficulties(n_trials, switch_trials, switch_difficulties):
+    """The difficulty sequencer as it was inlined in TwoStateContextTaskV2.py (non-practice blocks)."""
+    difficulty_levels = []
+    difficulty_pool = ['easiest', 'easy', 'medium', 'hard']
+    for item in difficulty_pool:
+        difficulty_levels += [item] * round((n_trials/4)+2)
+
+    trial_difficulties = []
+    consecutive_count = 0
+    last_difficulty = random.sample(difficulty_levels, 1)
+    remove_level = (",".join(last_difficulty))
+    difficulty_levels.remove(remove_level)
+
+    for _ in range(n_trials):
+        if _ in switch_trials:
+            next_difficulty = switch_difficulties[switch_trials.index(_)]
+            if next_difficulty == last_difficulty and consecutive_count >= 3:
+                consecutive_count = 4
+            else:
+                consecutive_count = 3
+        else:
+            next_difficulty = random.sample(difficulty_levels, 1)
+            if consecutive_count >= 4:
+                while next_difficulty == last_difficulty:
+                    next_difficulty = random.sample(difficulty_levels, 1)
+                consecutive_count = 1
+            else:
+                if next_difficulty == last_difficulty:
+                    consecutive_count += 1
+                else:
+                    consecutive_count = 1
+
+        trial_difficulties.append(next_difficulty)
+        last_difficulty = next_difficulty
+        remove_level = str(last_difficulty).strip("'[]'")
+        difficulty_levels.remove(remove_level)
+
+    return [str(level).strip("'[]'") for level in trial_difficulties]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    random.seed(0)
+    print(f"{'n_trials':>8} {'legacy ms':>10} {'counts ms':>10} {'speedup':>8} {'legacy run':>10} {'counts run':>10}")
+    for n_trials in TRIAL_COUNTS:
+        switch_trials = generate_switch_trials(n_trials, rng)
+        difficulty_pool, switch_pool = difficulty_pools('0')
+        switch_difficulties = list(rng.permutation(switch_pool))
+        repeat = max(1, 2000 // n_trials)
+
+        legacy_time = timeit.timeit(lambda: legacy_sequence_difficulties(n_trials, switch_trials, switch_difficulties), number=repeat) / repeat
+        counts_time = timeit.timeit(lambda: sequence_difficulties(n_trials, difficulty_pool, switch_trials, switch_difficulties, rng), number=repeat) / repeat
+
+        legacy_run = longest_run(legacy_sequence_difficulties(n_trials, switch_trials, switch_difficulties))
+        counts_run = longest_run(sequence_difficulties(n_trials, difficulty_pool, switch_trials, switch_difficulties, rng))
+        print(f"{n_trials:>8} {legacy_time * 1000:>10.2f} {counts_time * 1000:>10.2f} {legacy_time / counts_time:>7.1f}x {legacy_run:>10} {counts_run:>10}")
+
+
+if __name__ == '__main__':
+    main()
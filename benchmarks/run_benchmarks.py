@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Headless benchmarks of the rendering and scheduling hot paths, saved as JSON.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --json benchmarks/results/$(git rev-parse --short HEAD).json
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<older>.json
+
+Each benchmark is timed with timeit: the number of calls per run is picked by autorange()
+and the best, median and mean time per call over --repeat runs are reported.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hdmtask.compose import compose_choices, compose_scene_with_face, make_frame  # noqa: E402
+from hdmtask.dotcloud import DotCloud, sample_positions  # noqa: E402
+from hdmtask.render import BACKENDS  # noqa: E402
+from hdmtask.schedule import DEFAULT_EXP_INFO, TrialSchedule  # noqa: E402
+from hdmtask.stimuli import convert_to_grayscale  # noqa: E402
+
+WINDOW_SIZE = (1920, 1080)
+DOT_COUNTS = (1000, 10000, 100000)
+SCENE_SIZES = ((350, 350), (175, 175))  # Stimulus files, and as shown at 50% scale
+TRIAL_COUNTS = (80, 10000)
+N_IMAGES = {'rural': 50, 'urban': 50, 'male': 50, 'female': 50}
+GREY = (128, 128, 128)
+WHITE = (255, 255, 255)
+
+
+def random_surface(size, rng):
+    """A surface of random pixels, so blits and conversions are not special-cased."""
+    surface = pygame.Surface(size)
+    pygame.surfarray.blit_array(surface, rng.integers(0, 256, (*size, 3), dtype=np.uint8))
+    return surface.convert()
+
+
+def benchmarks(win):
+    """Yield (name, callable) pairs for every benchmark."""
+    rng = np.random.default_rng(0)
+    view_radius = min(WINDOW_SIZE) // 5
+    center = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
+
+    for n_dots in DOT_COUNTS:
+        yield f'sample_positions[{n_dots}]', lambda n_dots=n_dots: sample_positions(n_dots, view_radius, rng)
+        cloud = DotCloud(view_radius, center, rng=rng)
+        yield f'dot_cloud_prepare[{n_dots}]', lambda cloud=cloud, n_dots=n_dots: cloud.prepare(n_dots // 2, n_dots - n_dots // 2)
+
+    for backend in BACKENDS:
+        for n_dots in DOT_COUNTS[:2]:
+            cloud = DotCloud(view_radius, center, rng=rng, backend=backend)
+            cloud.reset(n_dots // 2, n_dots - n_dots // 2, 0.0)
+            clock = itertools.count(0.0, 1 / 60)
+
+            def frame(cloud=cloud, clock=clock):
+                cloud.update(next(clock))
+                win.fill(GREY)
+                cloud.render(win)
+            yield f'dot_frame[{backend},{n_dots}]', frame
+
+    for size in SCENE_SIZES:
+        scene = random_surface(size, rng)
+        yield f'convert_to_grayscale[{size[0]}x{size[1]}]', lambda scene=scene: convert_to_grayscale(scene)
+
+    frame_surface = make_frame(WINDOW_SIZE)
+    scene, face = random_surface(SCENE_SIZES[1], rng), random_surface(SCENE_SIZES[1], rng)
+    yield 'compose_scene_with_face', lambda: compose_scene_with_face(frame_surface, scene, face, True, GREY, WHITE)
+    icons = {name: random_surface((100, 100), rng) for name in ('male', 'female', 'city', 'landscape')}
+    yield 'compose_choices', lambda: compose_choices(frame_surface, icons, ['male', 'female', 'city', 'landscape'], GREY, WHITE)
+
+    for n_trials in TRIAL_COUNTS:
+        yield f'schedule_build[{n_trials}]', lambda n_trials=n_trials: TrialSchedule.build(DEFAULT_EXP_INFO, n_trials, N_IMAGES, seed=1)
+
+
+def time_benchmark(function, repeat):
+    """Return the timing of one benchmark, in microseconds per call."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+    return {'number': number, 'best_us': float(times.min()), 'median_us': float(np.median(times)), 'mean_us': float(times.mean())}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare against')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    win = pygame.display.set_mode(WINDOW_SIZE)
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as results_file:
+            previous = json.load(results_file)['results']
+
+    results = {}
+    print(f"{'benchmark':<32} {'best us':>12} {'median us':>12}" + (f" {'vs ' + os.path.basename(args.compare):>20}" if previous else ''))
+    for name, function in benchmarks(win):
+        if args.filter not in name:
+            continue
+        results[name] = time_benchmark(function, args.repeat)
+        line = f"{name:<32} {results[name]['best_us']:>12.1f} {results[name]['median_us']:>12.1f}"
+        if name in previous:
+            line += f" {results[name]['best_us'] / previous[name]['best_us']:>19.2f}x"
+        print(line)
+    pygame.quit()
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as results_file:
+            json.dump({'environment': environment(), 'results': results}, results_file, indent=1)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Support modules for the HDM dot cloud task (TwoStateContextTaskV2.py)."""
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Run the task with python -m hdmtask."""
+
+from hdmtask.timing import now
+
+START = now()
+
+from hdmtask.task import main  # noqa: E402
+
+main(START)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Index, load and summarize the HDMRalf data files of many sessions.
+
+    python -m hdmtask.analysis data/ --jobs 8
+
+Session files are found by name (HDMRalf_<subject>_<block>_<method>_<time>_data.csv, or its
+.parquet copy) and parsed in parallel into one array of trial records. The parsed trials
+are cached in the folder, keyed by file name and modification time, so later runs only
+parse files that are new or have changed. A cache written with another trial record
+schema is discarded.
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from hdmtask.records import CATEGORIES, HAVE_ARROW, TRIAL_DTYPE, TrialBuffer
+
+SESSION_CACHE = '.session_cache.npz'
+DATA_FILE = re.compile(r'^HDMRalf_(?P<subject>.+)_(?P<block>[^_]+)_(?P<method>BEH|fMRI)_(?P<time>[^_]+)_data\.(?P<format>csv|parquet)$')
+RT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+RECOVERY_LAGS = range(-3, 11)  # Trials relative to the first trial after a context switch
+SCHEMA = str(TRIAL_DTYPE.descr)  # Cached trials are only reused if they have the current fields and dtypes
+
+
+def find_sessions(folder):
+    """Return [(name, subject, block, method, time)] for the data files of a folder, sorted by name.
+
+    A session with both a CSV and a Parquet file is listed once, by its Parquet file if
+    pyarrow is installed to read it.
+    """
+    sessions = {}
+    for name in sorted(os.listdir(folder)):
+        match = DATA_FILE.match(name)
+        if match is None or (match['format'] == 'parquet' and not HAVE_ARROW):
+            continue
+        key = name[:-len(match['format'])]
+        if key not in sessions or match['format'] == 'parquet':
+            sessions[key] = (name, match['subject'], match['block'], match['method'], match['time'])
+    return [sessions[key] for key in sorted(sessions)]
+
+
+def read_session(path):
+    """Parse one data file into a structured array of records.TRIAL_DTYPE rows."""
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    return TrialBuffer.from_frame(frame).data
+
+
+class Sessions:
+    """Trials of many sessions in one structured array, with the session of every trial.
+
+    subject, block, method and time are arrays with one entry per session; offsets[i] is the
+    index of the first trial of session i in trials.
+    """
+
+    def __init__(self, names, mtimes, subject, block, method, time, offsets, trials):
+        self.names = np.asarray(names)
+        self.mtimes = np.asarray(mtimes, dtype=np.int64)
+        self.subject = np.asarray(subject)
+        self.block = np.asarray(block)
+        self.method = np.asarray(method)
+        self.time = np.asarray(time)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.trials = trials
+        lengths = np.diff(np.append(self.offsets, len(trials)))
+        self.session = np.repeat(np.arange(len(self.names)), lengths)
+        self.trial_number = np.arange(len(trials)) - self.offsets[self.session]
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def load(cls, folder, jobs=None):
+        """Load every session of a folder, parsing only the files the cache does not hold."""
+        found = find_sessions(folder)
+        mtimes = [os.stat(os.path.join(folder, name)).st_mtime_ns for name, *_ in found]
+        cached = {}
+        cache_path = os.path.join(folder, SESSION_CACHE)
+        try:
+            with np.load(cache_path) as cache:
+                if str(cache['schema']) == SCHEMA:
+                    bounds = np.append(cache['offsets'], len(cache['trials']))
+                    trials = cache['trials']
+                    for index, (name, mtime) in enumerate(zip(cache['names'].tolist(), cache['mtimes'].tolist())):
+                        cached[name, mtime] = trials[bounds[index]:bounds[index + 1]]
+        except (OSError, KeyError, ValueError):
+            pass
+
+        stale = [os.path.join(folder, name) for (name, *_), mtime in zip(found, mtimes) if (name, mtime) not in cached]
+        if jobs == 1 or len(stale) < 2:
+            parsed = [read_session(path) for path in stale]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                parsed = list(executor.map(read_session, stale, chunksize=max(1, len(stale) // (4 * (jobs or os.cpu_count() or 1)))))
+        parsed = iter(parsed)
+        session_trials = [cached[name, mtime] if (name, mtime) in cached else next(parsed) for (name, *_), mtime in zip(found, mtimes)]
+
+        columns = list(zip(*found)) or [()] * 5
+        offsets = np.cumsum([0] + [len(trials) for trials in session_trials[:-1]]) if session_trials else []
+        trials = np.concatenate(session_trials) if session_trials else np.empty(0, dtype=TRIAL_DTYPE)
+        sessions = cls(columns[0], mtimes, *columns[1:], offsets, trials)
+        if stale or len(cached) != len(found):
+            sessions.save_cache(cache_path)
+        return sessions
+
+    def save_cache(self, cache_path):
+        try:
+            # Write to a temporary file first so an interrupted run never leaves a truncated cache
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'wb') as cache_file:
+                np.savez(cache_file, schema=np.array(SCHEMA), names=self.names, mtimes=self.mtimes, offsets=self.offsets, trials=self.trials)
+            os.replace(temp_path, cache_path)
+        except OSError as error:
+            print(f"Could not cache the sessions in {cache_path}: {error}")
+
+    def select(self, subject=None, block=None, method=None):
+        """Sessions of the given subject, block and method (any if None)."""
+        keep = np.ones(len(self), dtype=bool)
+        for values, wanted in ((self.subject, subject), (self.block, block), (self.method, method)):
+            if wanted is not None:
+                keep &= values == str(wanted)
+        indices = np.flatnonzero(keep)
+        lengths = np.diff(np.append(self.offsets, len(self.trials)))[indices]
+        rows = np.flatnonzero(keep[self.session])
+        return Sessions(self.names[indices], self.mtimes[indices], self.subject[indices], self.block[indices],
+                        self.method[indices], self.time[indices], np.cumsum(np.append(0, lengths[:-1])), self.trials[rows])
+
+    def frame(self, fields):
+        """DataFrame of some trial fields with the subject of each trial, text fields decoded."""
+        columns = {'subject': self.subject[self.session]}
+        for name in fields:
+            values = self.trials[name]
+            columns[name] = pd.Categorical.from_codes(values, CATEGORIES[name]) if name in CATEGORIES else values
+        return pd.DataFrame(columns)
+
+
+def accuracy_by(sessions, field):
+    """Accuracy and trial count of each subject at each level of a trial field.
+
+    Proportion differences are rounded to 3 decimals, so trials of the same difficulty level
+    are grouped together.
+    """
+    frame = sessions.frame([field, 'correct_binary'])
+    if field == 'proportion_diff':
+        frame[field] = frame[field].round(3)
+    return frame.groupby(['subject', field], observed=True)['correct_binary'].agg(accuracy='mean', trials='size')
+
+
+def switch_rows(sessions):
+    """Index of the first trial after each context switch, within its session."""
+    context = sessions.trials['current_context']
+    changed = np.flatnonzero(context[1:] != context[:-1]) + 1
+    return changed[sessions.session[changed] == sessions.session[changed - 1]]
+
+
+def recovery_curves(sessions, lags=RECOVERY_LAGS):
+    """Accuracy of each subject on the trials around the context switches, by lag.
+
+    Lag 0 is the first trial in the new context; negative lags are the last trials before
+    the switch. Trials outside the switch's session are left out.
+    """
+    lags = np.asarray(lags)
+    switches = switch_rows(sessions)
+    rows = switches[:, None] + lags[None, :]
+    inside = (rows >= 0) & (rows < len(sessions.trials))
+    rows = np.where(inside, rows, 0)
+    inside &= sessions.session[rows] == sessions.session[switches][:, None]
+    frame = pd.DataFrame({
+        'subject': np.broadcast_to(sessions.subject[sessions.session[switches]][:, None], rows.shape)[inside],
+        'lag': np.broadcast_to(lags, rows.shape)[inside],
+        'correct': sessions.trials['correct_binary'][rows[inside]],
+    })
+    return frame.groupby(['subject', 'lag'])['correct'].agg(accuracy='mean', switches='size')
+
+
+def rt_quantiles(sessions, quantiles=RT_QUANTILES):
+    """Response time quantiles of each subject, for correct and incorrect responses (misses left out)."""
+    frame = sessions.frame(['correct', 'response_time'])
+    frame = frame[frame['correct'] != 'no response']
+    return frame.groupby(['subject', 'correct'], observed=True)['response_time'].quantile(list(quantiles)).unstack()
+
+
+def color_report_accuracy(sessions):
+    """Share of correct and missed color reports of each subject, by majority color."""
+    trials = sessions.trials
+    frame = sessions.frame(['majority_color'])
+    # Both columns code 'red' as 0 and 'yellow' as 1
+    frame['color_correct'] = trials['chosen_color'] == trials['majority_color']
+    frame['color_missed'] = trials['chosen_color'] == CATEGORIES['chosen_color'].index('No Response')
+    return frame.groupby(['subject', 'majority_color'], observed=True).agg(
+        accuracy=('color_correct', 'mean'), missed=('color_missed', 'mean'), trials=('color_correct', 'size'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder', nargs='?', default=os.getcwd(), help='folder holding the data files')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--subject', default=None)
+    parser.add_argument('--block', default=None)
+    parser.add_argument('--method', choices=('BEH', 'fMRI'), default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    sessions = Sessions.load(args.folder, args.jobs).select(args.subject, args.block, args.method)
+    print(f"{len(sessions)} sessions, {len(sessions.trials)} trials loaded in {time.perf_counter() - start:.2f} s")
+    if not len(sessions.trials):
+        return 1
+
+    with pd.option_context('display.max_rows', 200, 'display.width', 120, 'display.precision', 3):
+        print("\nAccuracy by proportion difference:")
+        print(accuracy_by(sessions, 'proportion_diff'))
+        print("\nAccuracy by context:")
+        print(accuracy_by(sessions, 'current_context'))
+        print("\nAccuracy around context switches:")
+        print(recovery_curves(sessions)['accuracy'].unstack())
+        print("\nResponse time quantiles (s):")
+        print(rt_quantiles(sessions))
+        print("\nColor reports by majority color:")
+        print(color_report_accuracy(sessions))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
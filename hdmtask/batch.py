@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Pre-computed, validated session schedules for every subject and block of a study.
+
+Generates the schedules in parallel, checks each one with validate_schedule() and writes
+them all to one compressed NumPy bundle:
+
+    python -m hdmtask.batch --subjects 101-140 --blocks practice 1 2 3 --method fMRI --out sessions.npz
+
+The task looks for sessions.npz in its working directory and uses the bundled schedule of
+the subject and block when there is one, instead of generating it at launch.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hdmtask.itifiles import TimingIndex
+from hdmtask.schedule import DEFAULT_EXP_INFO, DIFFICULTIES, TrialSchedule, validate_schedule
+from hdmtask.stimuli import list_images
+
+SESSION_BUNDLE = 'sessions.npz'
+IMAGE_KINDS = ('rural', 'urban', 'male', 'female')
+IMAGE_FOLDERS = {'rural': ('Scenes', 'rural'), 'urban': ('Scenes', 'urban'), 'male': ('Faces', 'male'), 'female': ('Faces', 'female')}
+N_TRIALS = 80
+
+
+def count_images(root):
+    """Number of images of each kind in the Scenes and Faces folders under root."""
+    return {kind: len(list_images(os.path.join(root, *IMAGE_FOLDERS[kind]))) for kind in IMAGE_KINDS}
+
+
+def parse_subjects(values):
+    """Expand subject arguments such as '101-105' into subject IDs."""
+    subjects = []
+    for value in values:
+        first, _, last = value.partition('-')
+        if last and first.isdigit() and last.isdigit():
+            subjects.extend(str(subject).zfill(len(first)) for subject in range(int(first), int(last) + 1))
+        else:
+            subjects.append(value)
+    return subjects
+
+
+def _build_one(task):
+    """Worker of build_sessions(): build and validate the schedule of one subject and block."""
+    subject, block, exp_info, n_trials, n_images, (timing_file, isi_durations, iti_durations), seed = task
+    session_info = dict(exp_info, Subject=subject, Block=block)
+    schedule = TrialSchedule.build(session_info, n_trials, n_images, isi_durations, iti_durations, seed)
+    return subject, block, schedule, timing_file, validate_schedule(schedule, block)
+
+
+def build_sessions(subjects, blocks, exp_info=None, n_trials=N_TRIALS, n_images=None, timing_index=None, seed=None, jobs=None):
+    """Build the schedules of every subject and block over jobs worker processes.
+
+    Each session gets its own seed from the batch seed, so a batch is reproducible. fMRI
+    sessions take their ISI/ITI from the file timing_index picks for the subject and block.
+    Returns a list of (subject, block, schedule, timing_file, problems) in subject, block order.
+    """
+    exp_info = {**DEFAULT_EXP_INFO, **(exp_info or {})}
+    pairs = [(subject, block) for subject in subjects for block in blocks]
+    seeds = np.random.SeedSequence(seed).generate_state(len(pairs))
+    tasks = []
+    for index, (subject, block) in enumerate(pairs):
+        timings = (None, None, None)
+        if exp_info['Method'] == 'fMRI':
+            timings = timing_index.pick(subject, block, n_trials, (exp_info['ISILow'], exp_info['ISIHigh']),
+                                        (exp_info['ITILow'], exp_info['ITIHigh']))
+        tasks.append((subject, block, exp_info, n_trials, n_images, timings, int(seeds[index])))
+    if jobs == 1:
+        return [_build_one(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_build_one, tasks, chunksize=max(1, len(tasks) // (4 * (jobs or os.cpu_count() or 1)))))
+
+
+def save_bundle(path, sessions, method, n_images):
+    """Write sessions from build_sessions() to one .npz bundle, each field stacked over sessions."""
+    arrays = {
+        'subject': np.array([subject for subject, _, _, _, _ in sessions]),
+        'block': np.array([block for _, block, _, _, _ in sessions]),
+        'method': np.array(method),
+        'n_images': np.array([n_images[kind] for kind in IMAGE_KINDS]),
+        'seed': np.array([schedule.seed for _, _, schedule, _, _ in sessions], dtype=np.uint32),
+        'switch_trials': np.array([schedule.switch_trials for _, _, schedule, _, _ in sessions], dtype=np.int16),
+        'timing_file': np.array([timing_file or '' for _, _, _, timing_file, _ in sessions]),
+    }
+    for name in TrialSchedule.FIELDS:
+        arrays[name] = np.stack([getattr(schedule, name) for _, _, schedule, _, _ in sessions])
+    np.savez_compressed(path, **arrays)
+
+
+def load_session(path, subject, block, exp_info, n_images, n_trials=N_TRIALS):
+    """Return the bundled schedule of a subject and block, or None if the bundle has none.
+
+    The dot proportions follow the difficulty levels in exp_info and self-guided sessions
+    drop the bundled ITIs. A bundled session is rejected (None) if it does not have n_trials
+    trials or its ISIs/ITIs fall outside the bounds in exp_info, so the dialog settings
+    still apply to a pre-computed session.
+    """
+    with np.load(path) as bundle:
+        matches = np.flatnonzero((bundle['subject'] == str(subject)) & (bundle['block'] == str(block)))
+        if not len(matches):
+            return None
+        if str(bundle['method']) != exp_info['Method']:
+            print(f"{path} holds {bundle['method']} sessions, not {exp_info['Method']}")
+            return None
+        bundled_images = dict(zip(IMAGE_KINDS, bundle['n_images'].tolist()))
+        if any(bundled_images[kind] > n_images[kind] for kind in IMAGE_KINDS):
+            print(f"{path} was built for {bundled_images} images, but only {n_images} are present")
+            return None
+        if bundle['difficulty'].shape[1] != n_trials:
+            print(f"{path} holds {bundle['difficulty'].shape[1]}-trial sessions, not {n_trials}")
+            return None
+        index = matches[0]
+        fields = {name: bundle[name][index] for name in TrialSchedule.FIELDS}
+        seed = int(bundle['seed'][index])
+        switch_trials = bundle['switch_trials'][index].tolist()
+
+    isi, iti = fields['isi'], fields['iti']
+    if isi.min() < exp_info['ISILow'] or isi.max() > exp_info['ISIHigh']:
+        print(f"Bundled ISIs {isi.min():.2f}-{isi.max():.2f} are outside {exp_info['ISILow']}-{exp_info['ISIHigh']}")
+        return None
+    if not exp_info['SelfGuided'] and (iti.min() < exp_info['ITILow'] or iti.max() > exp_info['ITIHigh']):
+        print(f"Bundled ITIs {iti.min():.2f}-{iti.max():.2f} are outside {exp_info['ITILow']}-{exp_info['ITIHigh']}")
+        return None
+
+    level_diffs = np.array([exp_info['EasiestDiff'], exp_info['EasyDiff'], exp_info['MediumDiff'], exp_info['HardDiff']])
+    fields['proportion_diff'] = level_diffs[fields['difficulty']]
+    if exp_info['SelfGuided']:
+        fields['iti'] = np.full(len(fields['iti']), np.nan)
+    return TrialSchedule(seed, switch_trials, **fields)
+
+
+def balance_summary(sessions):
+    """Range over sessions of the share of each level of the balanced trial fields."""
+    shares = {
+        'red majority': [schedule.majority_red.mean() for _, _, schedule, _, _ in sessions],
+        'city scene': [schedule.scene_type.mean() for _, _, schedule, _, _ in sessions],
+        'female face': [schedule.face_type.mean() for _, _, schedule, _, _ in sessions],
+        'face on top': [schedule.face_on_top.mean() for _, _, schedule, _, _ in sessions],
+    }
+    for level, name in enumerate(DIFFICULTIES):
+        shares[name] = [np.mean(schedule.difficulty == level) for _, _, schedule, _, _ in sessions]
+    return [f"  {name:<13} {min(values):.2f}-{max(values):.2f}" for name, values in shares.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subjects', nargs='+', required=True, help="subject IDs or ranges such as 101-140")
+    parser.add_argument('--blocks', nargs='+', required=True, help="block IDs, e.g. practice 1 2 3")
+    parser.add_argument('--method', choices=('BEH', 'fMRI'), default='BEH')
+    parser.add_argument('--out', default=SESSION_BUNDLE)
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the whole batch')
+    parser.add_argument('--trials', type=int, default=N_TRIALS)
+    parser.add_argument('--stimuli', default=os.getcwd(), help='folder holding Scenes/ and Faces/')
+    parser.add_argument('--timing-dir', default=os.path.join(os.getcwd(), 'QuantumITI_afni'), help='ISI/ITI files of fMRI sessions')
+    parser.add_argument('--isi', nargs=2, type=float, default=(DEFAULT_EXP_INFO['ISILow'], DEFAULT_EXP_INFO['ISIHigh']), metavar=('LOW', 'HIGH'))
+    parser.add_argument('--iti', nargs=2, type=float, default=(DEFAULT_EXP_INFO['ITILow'], DEFAULT_EXP_INFO['ITIHigh']), metavar=('LOW', 'HIGH'))
+    args = parser.parse_args(argv)
+
+    n_images = count_images(args.stimuli)
+    if not all(n_images.values()):
+        parser.error(f"no images found for {[kind for kind in IMAGE_KINDS if not n_images[kind]]} under {args.stimuli}")
+    timing_index = TimingIndex.load(args.timing_dir) if args.method == 'fMRI' else None
+    exp_info = {'Method': args.method, 'ISILow': args.isi[0], 'ISIHigh': args.isi[1], 'ITILow': args.iti[0], 'ITIHigh': args.iti[1]}
+
+    start = time.perf_counter()
+    try:
+        sessions = build_sessions(parse_subjects(args.subjects), args.blocks, exp_info, args.trials, n_images, timing_index, args.seed, args.jobs)
+    except ValueError as error:
+        print(error)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    problems = [(subject, block, problem) for subject, block, _, _, session_problems in sessions for problem in session_problems]
+    for subject, block, problem in problems:
+        print(f"  subject {subject} block {block}: {problem}")
+    if problems:
+        print(f"{len(problems)} problems found, no bundle written")
+        return 1
+    save_bundle(args.out, sessions, args.method, n_images)
+    print(f"{len(sessions)} sessions built and validated in {elapsed:.1f} s, written to {args.out}")
+    print("Share of trials per session:")
+    print('\n'.join(balance_summary(sessions)))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
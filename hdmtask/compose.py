@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Pre-composed full-screen frames for the image and choice phases of a trial."""
+
+import pygame
+
+DIRECTIONS = ['up', 'down', 'left', 'right']
+FIXATION_SIZE = 10
+
+
+def make_frame(size):
+    """Allocate a full-screen frame in the display pixel format."""
+    frame = pygame.Surface(size)
+    return frame.convert() if pygame.display.get_surface() is not None else frame
+
+
+def draw_fixation(surface, color):
+    """Draw the fixation square at the center of the surface and return its rect."""
+    width, height = surface.get_size()
+    half = FIXATION_SIZE // 2
+    return pygame.draw.rect(surface, color, (width // 2 - half, height // 2 - half, FIXATION_SIZE, FIXATION_SIZE))
+
+
+def compose_scene_with_face(frame, scene_image, face_image, face_on_top, background, fixation_color):
+    """Draw a scene and face image with one on top of the other, touching each other.
+
+    The images are drawn over the fixation screen, like they were drawn over the ISI screen.
+    Returns the rects of the two images.
+    """
+    win_size = frame.get_size()
+    frame.fill(background)
+    draw_fixation(frame, fixation_color)
+
+    # Define the positions for the images to ensure they are touching vertically
+    if face_on_top:
+        face_rect = face_image.get_rect(midbottom=(win_size[0] // 2, win_size[1] // 2))  # Center face at mid-bottom
+        scene_rect = scene_image.get_rect(midtop=face_rect.midbottom)  # Place scene directly below face
+    else:
+        scene_rect = scene_image.get_rect(midbottom=(win_size[0] // 2, win_size[1] // 2))  # Center scene at mid-bottom
+        face_rect = face_image.get_rect(midtop=scene_rect.midbottom)  # Place face directly below scene
+
+    frame.blit(face_image, face_rect)
+    frame.blit(scene_image, scene_rect)
+    return [face_rect, scene_rect]
+
+
+def choice_positions(win_size):
+    """Positions of the choices at the four cardinal directions, close to the fixation square."""
+    return {
+        'up': (win_size[0] // 2, win_size[1] // 2 - 100),
+        'down': (win_size[0] // 2, win_size[1] // 2 + 100),
+        'left': (win_size[0] // 2 - 150, win_size[1] // 2),
+        'right': (win_size[0] // 2 + 150, win_size[1] // 2)
+    }
+
+
+def compose_choices(frame, icons, choice_names, background, fixation_color):
+    """Draw the fixation square and the choice icons in the up, down, left and right slots.
+
+    Returns the rects of the icons.
+    """
+    positions = choice_positions(frame.get_size())
+    frame.fill(background)
+    draw_fixation(frame, fixation_color)
+
+    icon_rects = []
+    for choice_name, direction in zip(choice_names, DIRECTIONS):
+        icon_surface = icons[choice_name]
+        icon_rects.append(frame.blit(icon_surface, icon_surface.get_rect(center=positions[direction])))
+    return icon_rects
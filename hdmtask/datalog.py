@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Crash-safe trial logging through an append-only JSONL journal."""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from hdmtask.records import HAVE_ARROW, TrialBuffer, parquet_path
+
+_STOP = object()
+
+
+def _to_json(value):
+    """Convert NumPy scalars to plain Python values for json.dumps."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def read_journal(journal_path):
+    """Read the trial rows from a journal, skipping a final line left half-written by a crash."""
+    rows = []
+    with open(journal_path, encoding='utf-8') as journal:
+        for line in journal:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping incomplete journal line: {line!r}")
+    return rows
+
+
+class TrialWriter:
+    """Streams trial rows to a JSONL journal on a background thread.
+
+    Every row is flushed and fsynced as soon as the writer thread picks it up, so a crash
+    loses at most the trial in progress. close() rebuilds the CSV data file from the journal.
+
+    Given n_trials, rows are also kept in a typed records.TrialBuffer, written next to the
+    CSV as Parquet at close() when pyarrow is installed.
+    """
+
+    def __init__(self, csv_path, n_trials=None):
+        self.csv_path = csv_path
+        self.journal_path = os.path.splitext(csv_path)[0] + '.jsonl'
+        self.buffer = TrialBuffer(n_trials) if n_trials is not None else None
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='TrialWriter', daemon=True)
+        self.thread.start()
+
+    def write(self, trial_data):
+        """Queue a trial row; returns immediately so disk I/O never delays a flip."""
+        self.queue.put(dict(trial_data))
+        if self.buffer is not None:
+            self.buffer.append(trial_data)
+
+    def _run(self):
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            while True:
+                row = self.queue.get()
+                if row is _STOP:
+                    break
+                journal.write(json.dumps(row, default=_to_json) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def close(self):
+        """Drain the queue, stop the writer thread and write the CSV data file."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+        import pandas as pd  # Only needed here; importing it is slow
+
+        rows = read_journal(self.journal_path)
+        df = pd.DataFrame(rows)
+        df.to_csv(self.csv_path, index=False)
+        if self.buffer is not None and HAVE_ARROW:
+            self.buffer.write_parquet(parquet_path(self.csv_path))
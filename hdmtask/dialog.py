@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Tk dialog collecting the experiment info before the task starts."""
+
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+
+class ToolTip:
+    def __init__(self, widget, text):
+        self.widget = widget
+        self.text = text
+        self.tip_window = None
+        self.id = None
+        self.x = self.y = 0
+        self.widget.bind("<Enter>", self.show_tip)
+        self.widget.bind("<Leave>", self.hide_tip)
+
+    def show_tip(self, event=None):
+        self.x, self.y, _, _ = self.widget.bbox("insert")
+        self.x += self.widget.winfo_rootx() + 25
+        self.y += self.widget.winfo_rooty() + 25
+        self.create_tip_window()
+
+    def create_tip_window(self):
+        if self.tip_window or not self.text:
+            return
+        self.tip_window = tw = tk.Toplevel(self.widget)
+        tw.wm_overrideredirect(1)
+        tw.wm_geometry(f"+{self.x}+{self.y}")
+        label = tk.Label(tw, text=self.text, justify=tk.LEFT, background="#ffffe0", relief=tk.SOLID, borderwidth=1, font=("Arial", 10, "normal"))
+        label.pack(ipadx=1)
+
+    def hide_tip(self, event=None):
+        tw = self.tip_window
+        self.tip_window = None
+        if tw:
+            tw.destroy()
+
+
+class ExperimentInfoDialog(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Dot Cloud Task")
+        self.geometry("700x500")
+        self.configure(bg="#2E3440")  # Background color
+        
+        self.method_var = tk.StringVar(value="BEH")
+        self.subject_var = tk.StringVar()
+        self.block_var = tk.StringVar(value="0")
+        self.easiest_diff_var = tk.StringVar(value="0.30")
+        self.easy_diff_var = tk.StringVar(value="0.18")
+        self.medium_diff_var = tk.StringVar(value="0.12")
+        self.hard_diff_var = tk.StringVar(value="0.06")
+        self.isilow_var = tk.StringVar(value="0.1")
+        self.isihigh_var = tk.StringVar(value="0.5")
+        self.itilow_var = tk.StringVar(value="3")
+        self.itihigh_var = tk.StringVar(value="6")
+        self.self_guided_var = tk.BooleanVar()
+        self.tutorial_var = tk.BooleanVar()
+        self.adaptive_var = tk.BooleanVar()
+        self.stimulipres_var = tk.StringVar(value="1.5")
+        self.responsewindow_var = tk.StringVar(value="5")
+        
+        # Styling
+        label_style = {"font": ("Arial", 12, "bold"), "bg": "#2E3440", "fg": "#D8DEE9"}
+        entry_style = {"bg": "#4C566A", "fg": "#D8DEE9", "insertbackground": "#D8DEE9", "font": ("Arial", 12)}
+        button_style = {"bg": "#5E81AC", "fg": "#ECEFF4", "font": ("Arial", 12, "bold")}
+        
+        # Title Label
+        tk.Label(self, text="Dynamic Dot Cloud Task", font=("Arial", 16, "bold"), bg="#2E3440", fg="#D8DEE9").pack(pady=1)
+        
+        # Create frames for left and right side
+        main_frame = tk.Frame(self, bg="#2E3440")
+        main_frame.pack(expand=True, fill=tk.BOTH, padx=20, pady=2)
+        
+        left_frame = tk.Frame(main_frame, bg="#2E3440")
+        left_frame.grid(row=0, column=0, padx=40, pady=0, sticky="n")
+        
+        right_frame = tk.Frame(main_frame, bg="#2E3440")
+        right_frame.grid(row=0, column=1, padx=40, pady=0, sticky="n")
+        
+        # Left side (Method, Subject ID, Block)
+        tk.Label(left_frame, text="Method:", **label_style).pack(pady=2, anchor="w")
+        method_menu = ttk.Combobox(left_frame, textvariable=self.method_var, values=["BEH", "fMRI"], state="readonly")
+        method_menu.pack(pady=0, anchor="w")
+        ToolTip(method_menu, "fMRI: 6 second initiation delay, 10 second delay after task completed")
+        
+        tk.Label(left_frame, text="Subject ID:", **label_style).pack(pady=2, anchor="w")
+        subject_entry = tk.Entry(left_frame, textvariable=self.subject_var, **entry_style)
+        subject_entry.pack(pady=0, anchor="w")
+        
+        tk.Label(left_frame, text="Block:", **label_style).pack(pady=2, anchor="w")
+        block_menu = ttk.Combobox(left_frame, textvariable=self.block_var, values=[0, 1, 2, 3, 4, 5, 6, "practice"], state="readonly")
+        block_menu.pack(pady=0, anchor="w")
+        ToolTip(block_menu, "Practice: Reports participant score and whether 70% accuracy threshold has been met")
+        
+        
+        tk.Label(left_frame, text="ISI LowerBound and UpperBound:", **label_style).pack(pady=2, anchor="w")
+
+        isi_frame = tk.Frame(left_frame, bg="#2E3440")  # Create a frame to hold the entry widgets
+        isi_frame.pack(anchor="w", pady=2)  # Pack the frame within left_frame
+        
+        isilow_entry = tk.Entry(isi_frame, textvariable=self.isilow_var, width=5, **entry_style)
+        isihigh_entry = tk.Entry(isi_frame, textvariable=self.isihigh_var, width=5, **entry_style)
+        
+        isilow_entry.pack(side="left", pady=0, padx=(0, 5))  # Pack the low entry to the left with padding
+        isihigh_entry.pack(side="left", pady=0)  # Pack the high entry to the left
+        
+        ToolTip(isihigh_entry, "Upperbound time in seconds between cue and target")
+        ToolTip(isilow_entry, "Lowerbound time in seconds between cue and target")
+        
+        
+        tk.Label(left_frame, text="ITI LowerBound and UpperBound:", **label_style).pack(pady=2, anchor="w")
+
+        iti_frame = tk.Frame(left_frame, bg="#2E3440")  # Create a frame to hold the entry widgets
+        iti_frame.pack(anchor="w", pady=2)  # Pack the frame within left_frame
+        
+        itilow_entry = tk.Entry(iti_frame, textvariable=self.itilow_var, width=5, **entry_style)
+        itihigh_entry = tk.Entry(iti_frame, textvariable=self.itihigh_var, width=5, **entry_style)
+        
+        itilow_entry.pack(side="left", pady=0, padx=(0, 5))  # Pack the low entry to the left with padding
+        itihigh_entry.pack(side="left", pady=0)  # Pack the high entry to the left
+        
+        
+        ToolTip(itihigh_entry, "Upperbound time in seconds between trials")
+        ToolTip(itilow_entry, "Lowerbound time in seconds between trials")
+        
+        guidecheckbox = tk.Checkbutton(left_frame, text="Self-guided", variable=self.self_guided_var, bg="#2E3440", fg="#D8DEE9", selectcolor="#4C566A", font=("Arial", 12))
+        guidecheckbox.pack(pady=2, anchor="w")
+        ToolTip(guidecheckbox, "Wait for user keypress to initiate next trial with a max limit of 30 seconds")
+
+        adaptivecheckbox = tk.Checkbutton(left_frame, text="Adaptive", variable=self.adaptive_var, bg="#2E3440", fg="#D8DEE9", selectcolor="#4C566A", font=("Arial", 12))
+        adaptivecheckbox.pack(pady=2, anchor="w")
+        ToolTip(adaptivecheckbox, "Set the proportion difference of each trial with QUEST from the color reports,\nstarting from the Medium Proportion Difference")
+        
+        # Right side (Proportion Differences)
+        tk.Label(right_frame, text="Easiest Proportion Difference:", **label_style).pack(pady=2, anchor="w")
+        easiest_diff_entry = tk.Entry(right_frame, textvariable=self.easiest_diff_var, **entry_style)
+        easiest_diff_entry.pack(pady=0, anchor="w")
+        ToolTip(easiest_diff_entry, "0 = 50-50 split of red/yellow\n1 = 100% of one color")
+        
+        tk.Label(right_frame, text="Easy Proportion Difference:", **label_style).pack(pady=2, anchor="w")
+        easy_diff_entry = tk.Entry(right_frame, textvariable=self.easy_diff_var, **entry_style)
+        easy_diff_entry.pack(pady=0, anchor="w")
+        ToolTip(easy_diff_entry, "0 = 50-50 split of red/yellow\n1 = 100% of one color")
+        
+        tk.Label(right_frame, text="Medium Proportion Difference:", **label_style).pack(pady=2, anchor="w")
+        medium_diff_entry = tk.Entry(right_frame, textvariable=self.medium_diff_var, **entry_style)
+        medium_diff_entry.pack(pady=0, anchor="w")
+        ToolTip(medium_diff_entry, "0 = 50-50 split of red/yellow\n1 = 100% of one color")
+        
+        tk.Label(right_frame, text="Hard Proportion Difference:", **label_style).pack(pady=2, anchor="w")
+        hard_diff_entry = tk.Entry(right_frame, textvariable=self.hard_diff_var, **entry_style)
+        hard_diff_entry.pack(pady=0, anchor="w")
+        ToolTip(hard_diff_entry, "0 = 50-50 split of red/yellow\n1 = 100% of one color")
+        
+        tk.Label(right_frame, text="Stimuli Presentation Time", **label_style).pack(pady=2, anchor="w")
+        stimulipres_entry = tk.Entry(right_frame, textvariable=self.stimulipres_var, **entry_style)
+        stimulipres_entry.pack(pady=0, anchor="w")
+        ToolTip(stimulipres_entry, "Dot Cloud Presentation Time")
+        
+        tk.Label(right_frame, text="Face/Scene Response Window", **label_style).pack(pady=2, anchor="w")
+        responsewindow_entry = tk.Entry(right_frame, textvariable=self.responsewindow_var, **entry_style)
+        responsewindow_entry.pack(pady=0, anchor="w")
+        ToolTip(responsewindow_entry, "Response window time limit for face/scene decisions")
+        
+        tutorialcheckbox = tk.Checkbutton(right_frame, text="Tutorial", variable=self.tutorial_var, bg="#2E3440", fg="#D8DEE9", selectcolor="#4C566A", font=("Arial", 12))
+        tutorialcheckbox.pack(pady=2, anchor="w")
+        ToolTip(tutorialcheckbox, "Include tutorial instructions prior to beginning the task")
+        
+        # OK Button at the bottom center
+        tk.Button(right_frame, text="OK", command=self.ok, **button_style).pack(pady=75, anchor='e')
+        
+        # Halassa Lab text at the bottom left
+        tk.Label(left_frame, text="Halassa Lab, 2024", font=("Arial", 10), bg="#2E3440", fg="#D8DEE9").pack(side=tk.LEFT, padx=0, pady=20, anchor = 'w')
+       
+        
+        self.result = None
+    
+    def ok(self):
+        if (self.method_var.get() and self.subject_var.get() and self.block_var.get() and 
+            self.easiest_diff_var.get() and self.easy_diff_var.get() and 
+            self.medium_diff_var.get() and self.hard_diff_var.get() and self.isilow_var.get() and
+            self.isihigh_var.get() and self.itilow_var.get() and self.itihigh_var.get()):
+            easiest_diff = float(self.easiest_diff_var.get())
+            easy_diff = float(self.easy_diff_var.get())
+            medium_diff = float(self.medium_diff_var.get())
+            hard_diff = float(self.hard_diff_var.get())
+            itihigh = float(self.itihigh_var.get())
+            isihigh = float(self.isihigh_var.get())
+            itilow = float(self.itilow_var.get())
+            isilow = float(self.isilow_var.get())
+            stimulipres = float(self.stimulipres_var.get())
+            responsewindow = float(self.responsewindow_var.get())
+            self.result = {
+                "Method": self.method_var.get(),
+                "Subject": self.subject_var.get(),
+                "Block": self.block_var.get(),
+                "EasiestDiff": easiest_diff,
+                "EasyDiff": easy_diff,
+                "MediumDiff": medium_diff,
+                "HardDiff": hard_diff,
+                "SelfGuided": self.self_guided_var.get(),
+                "Tutorial": self.tutorial_var.get(),
+                "Adaptive": self.adaptive_var.get(),
+                "ITIHigh": itihigh,
+                "ISIHigh": isihigh,
+                "ITILow": itilow,
+                "ISILow": isilow,
+                "ResponseWindow": responsewindow,
+                "StimuliPres": stimulipres
+            }
+            self.destroy()
+        else:
+            messagebox.showwarning("Warning", "All fields must be filled out")
+
+
+def show_error(title, message):
+    """Show an error in a message box once the experiment info dialog has closed."""
+    root = tk.Tk()
+    root.withdraw()
+    messagebox.showerror(title, message, parent=root)
+    root.destroy()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Partial display updates limited to the regions that changed between phases."""
+
+import pygame
+
+
+class DisplayUpdater:
+    """Pushes only the changed regions of the window to the screen and counts the pixels pushed.
+
+    The regions of the previous update are pushed again with the current ones, so whatever
+    the previous phase drew is cleared from the screen as well. Every phase draws on a full
+    background fill, so the rest of the window never changes between phases.
+
+    SCALED and OPENGL displays present the whole window through a renderer on every update,
+    so partial updates gain nothing there. Pass renderer=True for them (open_display() says
+    whether the window is one) and every update is a full flip, counted as the whole window.
+    """
+
+    def __init__(self, window, renderer=False):
+        self.window = window
+        self.full_rect = window.get_rect()
+        self.partial = not renderer
+        self.previous = [self.full_rect]
+        self.pixels = {}
+        self.updates = {}
+
+    def show(self, rects=None, phase='other'):
+        """Push rects (default the whole window) and the regions of the previous update.
+
+        Returns the number of pixels pushed.
+        """
+        if rects is None:
+            current = [self.full_rect]
+        else:
+            current = [self.full_rect.clip(rect) for rect in rects]
+        if self.partial and rects is not None:
+            dirty = [rect for rect in self.previous + current if rect.width and rect.height]
+            pygame.display.update(dirty)
+            pixels = sum(rect.width * rect.height for rect in dirty)
+        else:
+            pygame.display.flip()
+            pixels = self.full_rect.width * self.full_rect.height
+        self.previous = current
+        self.pixels[phase] = self.pixels.get(phase, 0) + pixels
+        self.updates[phase] = self.updates.get(phase, 0) + 1
+        return pixels
+
+    def summary(self):
+        """One line per phase with the number of updates and the mean pixels pushed per update."""
+        full = self.full_rect.width * self.full_rect.height
+        lines = [f"Display updates ({'partial' if self.partial else 'full flips'}):"]
+        for phase, pixels in self.pixels.items():
+            n_updates = self.updates[phase]
+            mean = pixels / n_updates
+            lines.append(f"  {phase:<10} {n_updates:>6} updates  {mean:>12,.0f} px/update  ({100 * mean / full:.1f}% of window)")
+        return '\n'.join(lines)
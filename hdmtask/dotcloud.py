@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Vectorized dot cloud engine used for the dot cloud cue."""
+
+import numpy as np
+
+from hdmtask.render import RED, YELLOW, make_backend
+from hdmtask.timing import now
+
+
+def sample_positions(n, view_radius, rng):
+    """Sample n dot positions within the view radius, returned as an (n, 2) array."""
+    # Same distribution as the original per-dot generate_position(): x uniform over the
+    # diameter, y uniform over the chord at that x
+    x = rng.uniform(-view_radius, view_radius, n)
+    y_range = np.sqrt(view_radius**2 - x**2)
+    y = rng.uniform(-1.0, 1.0, n) * y_range
+    return np.column_stack((x, y))
+
+
+class DotCloud:
+    """Dot cloud with positions, half-lives, creation times and colors held in NumPy arrays.
+
+    update() and render() work in buffers allocated when a cloud starts, so a steady-state
+    frame allocates no arrays: expired dots are replaced by drawing candidates for every dot
+    into the buffers and copying them in where the dot has expired.
+    """
+
+    def __init__(self, view_radius, center, dot_radius=4, half_life_range=(0.1, 0.5), rng=None, backend='circle'):
+        self.view_radius = view_radius
+        self.center = center
+        self.dot_radius = dot_radius
+        self.backend = make_backend(backend, dot_radius) if isinstance(backend, str) else backend
+        self.half_life_range = half_life_range
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.n_buffered = None
+        self.reset(0, 0, now())
+
+    def reset(self, n_red, n_yellow, current_time):
+        """Start a new cloud of n_red red and n_yellow yellow dots created at current_time."""
+        self.prepare(n_red, n_yellow)
+        self.start(current_time)
+
+    def prepare(self, n_red, n_yellow):
+        """Sample the initial arrays of the next cloud ahead of time, e.g. during the ITI."""
+        n_dots = n_red + n_yellow
+        positions = sample_positions(n_dots, self.view_radius, self.rng)
+        half_lives = self.rng.uniform(*self.half_life_range, n_dots)
+
+        # Shuffle which dots are red so colors are spread over the array
+        is_red = np.zeros(n_dots, dtype=bool)
+        is_red[:n_red] = True
+        self.rng.shuffle(is_red)
+        self.prepared = (positions, half_lives, is_red)
+
+    def start(self, current_time):
+        """Show the prepared cloud, with every dot created at current_time."""
+        self.positions, self.half_lives, self.is_red = self.prepared
+        self.prepared = None
+        self.creation_times = np.full(len(self.positions), current_time, dtype=float)
+        self.colors = np.where(self.is_red[:, None], RED, YELLOW).astype(np.uint8)
+        self.xs, self.ys = self.positions[:, 0], self.positions[:, 1]
+        self.allocate_buffers(len(self.positions))
+
+        # Per-frame cost accounting
+        self.n_frames = 0
+        self.update_time = 0.0
+        self.render_time = 0.0
+        self.max_frame_time = 0.0
+        self._frame_time = 0.0
+
+    def allocate_buffers(self, n_dots):
+        """Allocate the per-frame work buffers, unless the last cloud had as many dots."""
+        if n_dots == self.n_buffered:
+            return
+        self.n_buffered = n_dots
+        self.age = np.empty(n_dots)
+        self.expired = np.empty(n_dots, dtype=bool)
+        self.new_xs = np.empty(n_dots)
+        self.new_ys = np.empty(n_dots)
+        self.y_ranges = np.empty(n_dots)
+        self.new_half_lives = np.empty(n_dots)
+        self.shifted = np.empty(n_dots)
+        self.pixel_xs = np.empty(n_dots, dtype=np.intp)
+        self.pixel_ys = np.empty(n_dots, dtype=np.intp)
+
+    def sample_candidates(self):
+        """Draw a new position and half-life for every dot into the candidate buffers.
+
+        Same distributions as sample_positions() and the initial half-lives, computed in place.
+        """
+        view_radius = self.view_radius
+        self.rng.random(out=self.new_xs)
+        self.new_xs *= 2 * view_radius
+        self.new_xs -= view_radius
+        np.multiply(self.new_xs, self.new_xs, out=self.y_ranges)
+        np.subtract(view_radius**2, self.y_ranges, out=self.y_ranges)
+        np.sqrt(self.y_ranges, out=self.y_ranges)
+        self.rng.random(out=self.new_ys)
+        self.new_ys *= 2.0
+        self.new_ys -= 1.0
+        self.new_ys *= self.y_ranges
+        low, high = self.half_life_range
+        self.rng.random(out=self.new_half_lives)
+        self.new_half_lives *= high - low
+        self.new_half_lives += low
+
+    def update(self, current_time):
+        """Replace every dot whose half-life has passed. Returns the number of replaced dots."""
+        tick = now()
+        np.subtract(current_time, self.creation_times, out=self.age)
+        np.greater_equal(self.age, self.half_lives, out=self.expired)
+        n_expired = int(np.count_nonzero(self.expired))
+        if n_expired:
+            self.sample_candidates()
+            np.copyto(self.xs, self.new_xs, where=self.expired)
+            np.copyto(self.ys, self.new_ys, where=self.expired)
+            np.copyto(self.half_lives, self.new_half_lives, where=self.expired)
+            np.copyto(self.creation_times, current_time, where=self.expired)
+        elapsed = now() - tick
+        self.update_time += elapsed
+        self._frame_time = elapsed
+        return n_expired
+
+    def render(self, surface):
+        """Draw the cloud on the surface, centered on self.center."""
+        tick = now()
+        # Truncated to whole pixels like astype(int). Adding straight into the integer
+        # buffers would allocate a casting buffer, so the sums go through a float one
+        np.add(self.xs, self.center[0], out=self.shifted)
+        np.copyto(self.pixel_xs, self.shifted, casting='unsafe')
+        np.add(self.ys, self.center[1], out=self.shifted)
+        np.copyto(self.pixel_ys, self.shifted, casting='unsafe')
+        self.backend.draw(surface, self.pixel_xs, self.pixel_ys, self.is_red)
+        elapsed = now() - tick
+        self.render_time += elapsed
+        self.n_frames += 1
+        self.max_frame_time = max(self.max_frame_time, self._frame_time + elapsed)
+
+    def frame_cost(self):
+        """Return the mean update/render cost and the worst frame cost in milliseconds."""
+        n_frames = max(self.n_frames, 1)
+        return {
+            'dot_update_ms': 1000 * self.update_time / n_frames,
+            'dot_render_ms': 1000 * self.render_time / n_frames,
+            'dot_frame_max_ms': 1000 * self.max_frame_time,
+        }
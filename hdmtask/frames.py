@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Frame-locked presentation of timed stimuli with dropped-frame accounting."""
+
+import numpy as np
+import pygame
+
+from hdmtask.profiling import PhaseProfiler
+from hdmtask.timing import now
+
+DEFAULT_REFRESH_RATE = 60.0
+
+
+def open_display(size, flags=0):
+    """Open the window with vsync where the platform allows it. Returns (window, vsync, renderer).
+
+    renderer is True if the window is SCALED or OPENGL, so a renderer presents all of it on
+    every update. The flags cannot be read back from the window, which reports its surface
+    flags rather than the set_mode() ones.
+    """
+    try:
+        # pygame only honours vsync for SCALED or OPENGL displays
+        return pygame.display.set_mode(size, flags | pygame.SCALED, vsync=1), True, True
+    except pygame.error:
+        return pygame.display.set_mode(size, flags), False, bool(flags & (pygame.SCALED | pygame.OPENGL))
+
+
+class FrameScheduler:
+    """Counts stimulus durations in display frames and records the time of every flip."""
+
+    def __init__(self, vsync, refresh_rate=None, clock=None, display=None, profiler=None):
+        self.vsync = vsync
+        self.clock = clock if clock is not None else pygame.time.Clock()
+        self.display = display
+        self.profiler = profiler if profiler is not None else PhaseProfiler()
+        self.refresh_rate = refresh_rate or self.measure_refresh_rate()
+        self.frame_interval = 1.0 / self.refresh_rate
+        self.flip_times = []
+
+    def measure_refresh_rate(self, n_flips=30):
+        """Estimate the refresh rate from flip intervals, falling back to 60 Hz without vsync."""
+        get_refresh_rate = getattr(pygame.display, 'get_current_refresh_rate', None)
+        if get_refresh_rate is not None and get_refresh_rate() > 0:
+            return float(get_refresh_rate())
+        if not self.vsync:
+            return DEFAULT_REFRESH_RATE
+        flip_times = []
+        for _ in range(n_flips):
+            pygame.display.flip()
+            flip_times.append(now())
+        interval = float(np.median(np.diff(flip_times)))
+        if interval < 0.002:
+            # Flip returned immediately, so the driver ignored the vsync request
+            self.vsync = False
+            return DEFAULT_REFRESH_RATE
+        return 1.0 / interval
+
+    def n_frames_for(self, duration):
+        """Number of display frames that make up a duration in seconds."""
+        return max(1, round(duration * self.refresh_rate))
+
+    def flip(self, rects=None, phase='frames'):
+        """Flip the display, pacing with the clock when vsync is not available. Returns the flip time.
+
+        With a DisplayUpdater only rects (default the whole window) are pushed to the screen.
+        """
+        flip_time = self.paced_flip(rects, phase)
+        self.flip_times.append(flip_time)
+        return flip_time
+
+    def paced_flip(self, rects=None, phase='frames'):
+        if not self.vsync:
+            self.clock.tick(self.refresh_rate)
+        with self.profiler.phase('flip'):
+            if self.display is not None:
+                self.display.show(rects, phase)
+            else:
+                pygame.display.flip()
+        return now()
+
+    def end(self, rects=None, phase='frames'):
+        """Flip the screen that follows a presentation, one frame after its last flip.
+
+        Without vsync the flip is paced like the presentation's own, so the last frame is
+        shown for a full frame period. Returns the flip time, which frame_stats() leaves out.
+        """
+        return self.paced_flip(rects, phase)
+
+    def present(self, duration, draw_frame, rects=None, phase='frames'):
+        """Call draw_frame() and flip until duration has elapsed in display frames.
+
+        Dropped frames count towards the duration, so a late flip does not lengthen the stimulus.
+        rects are the regions draw_frame() changes, if it leaves the rest of the window alone.
+        """
+        n_frames = self.n_frames_for(duration)
+        self.flip_times = []
+        frame = 0
+        while frame < n_frames:
+            draw_frame()
+            self.flip(rects, phase)
+            if len(self.flip_times) > 1:
+                frame += max(1, round((self.flip_times[-1] - self.flip_times[-2]) / self.frame_interval))
+            else:
+                frame = 1
+
+    def frame_stats(self):
+        """Frame statistics of the last presentation, in seconds."""
+        intervals = np.diff(self.flip_times)
+        missed = np.rint(intervals / self.frame_interval) - 1
+        return {
+            'n_frames': len(self.flip_times),
+            'dropped_frames': int(missed[missed > 0].sum()),
+            'max_frame_interval': float(intervals.max()) if len(intervals) else 0.0,
+        }
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Index of the ISI/ITI timing files of fMRI sessions (QuantumITI_afni)."""
+
+import os
+import zlib
+
+import numpy as np
+
+from hdmtask.schedule import read_timing_file
+
+TIMING_INDEX = '.timing_index.npz'
+
+
+def _block_number(block):
+    return int(block) if str(block).isdigit() else zlib.crc32(str(block).encode())
+
+
+class TimingIndex:
+    """ISI and ITI values of every timing file in a folder, held in NaN-padded arrays.
+
+    Files are parsed once; the parsed arrays are cached in the folder and reused for as long
+    as no file is added, removed or modified.
+    """
+
+    def __init__(self, names, mtimes, isi, iti, lengths):
+        self.names = list(names)
+        self.mtimes = np.asarray(mtimes, dtype=np.int64)
+        self.isi = np.asarray(isi, dtype=float)
+        self.iti = np.asarray(iti, dtype=float)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def list_files(folder):
+        """Return the (names, mtimes) of the timing files of a folder, sorted by name."""
+        entries = sorted((entry.name, entry.stat().st_mtime_ns) for entry in os.scandir(folder)
+                         if entry.is_file() and not entry.name.startswith('.'))
+        return [name for name, _ in entries], [mtime for _, mtime in entries]
+
+    @classmethod
+    def parse(cls, folder, names, mtimes):
+        timings = [read_timing_file(os.path.join(folder, name)) for name in names]
+        lengths = [min(len(isi), len(iti)) for isi, iti in timings]
+        isi = np.full((len(names), max(lengths, default=0)), np.nan)
+        iti = np.full_like(isi, np.nan)
+        for row, (file_isi, file_iti) in enumerate(timings):
+            isi[row, :lengths[row]] = file_isi[:lengths[row]]
+            iti[row, :lengths[row]] = file_iti[:lengths[row]]
+        return cls(names, mtimes, isi, iti, lengths)
+
+    @classmethod
+    def load(cls, folder):
+        """Load the index of a folder from its cache, re-parsing the files if any of them changed."""
+        names, mtimes = cls.list_files(folder)
+        cache_path = os.path.join(folder, TIMING_INDEX)
+        try:
+            with np.load(cache_path) as cache:
+                if cache['names'].tolist() == names and cache['mtimes'].tolist() == mtimes:
+                    return cls(names, mtimes, cache['isi'], cache['iti'], cache['lengths'])
+        except (OSError, KeyError, ValueError):
+            pass
+
+        index = cls.parse(folder, names, mtimes)
+        try:
+            # Write to a temporary file first so an interrupted run never leaves a truncated index
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'wb') as cache_file:
+                np.savez(cache_file, names=np.array(names), mtimes=index.mtimes, isi=index.isi, iti=index.iti, lengths=index.lengths)
+            os.replace(temp_path, cache_path)
+        except OSError as error:
+            print(f"Could not cache the timing file index of {folder}: {error}")
+        return index
+
+    def timings(self, file_index):
+        """Return the (isi, iti) arrays of a file."""
+        length = self.lengths[file_index]
+        return self.isi[file_index, :length], self.iti[file_index, :length]
+
+    def problems(self, n_trials, isi_range, iti_range):
+        """Return {name: problem} for the files that cannot time an n_trials session."""
+        problems = {}
+        window = slice(0, n_trials)
+        for file_index, name in enumerate(self.names):
+            isi, iti = self.isi[file_index, window], self.iti[file_index, window]
+            if self.lengths[file_index] < n_trials:
+                problems[name] = f"{self.lengths[file_index]} ISI/ITI pairs for {n_trials} trials"
+            elif isi.min() < isi_range[0] or isi.max() > isi_range[1]:
+                problems[name] = f"ISIs {isi.min():.2f}-{isi.max():.2f} outside {isi_range[0]}-{isi_range[1]}"
+            elif iti.min() < iti_range[0] or iti.max() > iti_range[1]:
+                problems[name] = f"ITIs {iti.min():.2f}-{iti.max():.2f} outside {iti_range[0]}-{iti_range[1]}"
+        return problems
+
+    def pick(self, subject, block, n_trials, isi_range, iti_range):
+        """Pick the timing file of a subject and block. Returns (name, isi, iti).
+
+        Each subject starts at its own file and moves to the next valid file with each block,
+        so the same subject and block always get the same timings. Raises ValueError if no
+        file has n_trials ISI/ITI pairs within the ranges.
+        """
+        problems = self.problems(n_trials, isi_range, iti_range)
+        valid = [file_index for file_index, name in enumerate(self.names) if name not in problems]
+        if not valid:
+            details = ''.join(f"\n  {name}: {problem}" for name, problem in problems.items())
+            raise ValueError(f"No usable timing file for {n_trials} trials:{details or ' the folder has no files'}")
+        file_index = valid[(zlib.crc32(str(subject).encode()) + _block_number(block)) % len(valid)]
+        isi, iti = self.timings(file_index)
+        return self.names[file_index], isi[:n_trials], iti[:n_trials]
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Live performance monitor: rolling statistics of the trial stream, sent to a console process.
+
+The task updates a PerformanceMonitor after every trial and sends its snapshot as one JSON
+datagram. Sending never blocks and is silently dropped when nobody listens, so it costs the
+pygame process a few microseconds per trial. Watch a running session from another console:
+
+    python -m hdmtask.monitor
+
+Datagrams go to a UNIX socket in the temp folder, or to a UDP port on localhost on Windows,
+which has no UNIX datagram sockets.
+"""
+
+import argparse
+import json
+import math
+import os
+import socket
+import sys
+import tempfile
+
+MONITOR_ENV = 'HDMTASK_MONITOR'  # UNIX socket path or UDP port overriding the default address
+MONITOR_SOCKET = os.path.join(tempfile.gettempdir(), 'hdmtask_monitor.sock')
+MONITOR_PORT = 47621
+WINDOW = 10
+RECOVERY_RUN = 3  # Consecutive correct trials that count as having learned a new context
+MAX_DATAGRAM = 65507
+
+
+def monitor_address(setting=None):
+    """Return (family, address) of the monitor channel, from setting or MONITOR_ENV."""
+    setting = setting if setting is not None else os.environ.get(MONITOR_ENV, '')
+    if setting.isdigit():
+        return socket.AF_INET, ('127.0.0.1', int(setting))
+    if hasattr(socket, 'AF_UNIX') and sys.platform != 'win32':
+        return socket.AF_UNIX, setting or MONITOR_SOCKET
+    return socket.AF_INET, ('127.0.0.1', MONITOR_PORT)
+
+
+class PerformanceMonitor:
+    """Rolling accuracy and response time statistics with O(1) updates.
+
+    The last window trials are held in ring buffers with running sums, so each record()
+    adds the new trial and subtracts the one leaving the window. Context switches are found
+    from the trial contexts; trials-to-recover is the number of trials after a switch up to
+    and including the first of RECOVERY_RUN consecutive correct trials.
+    """
+
+    def __init__(self, window=WINDOW, recovery_run=RECOVERY_RUN):
+        self.window = window
+        self.recovery_run = recovery_run
+        self.correct = [0] * window
+        self.rts = [math.nan] * window
+        self.n_trials = 0
+        self.n_correct = 0
+        self.window_correct = 0
+        self.window_rts = 0
+        self.rt_sum = 0.0
+        self.rt_sum_squares = 0.0
+        self.context = None
+        self.since_switch = None
+        self.run = 0
+        self.recovery = []
+
+    def record(self, correct, response_time, no_response, context):
+        slot = self.n_trials % self.window
+        if self.n_trials >= self.window:
+            self.window_correct -= self.correct[slot]
+            if not math.isnan(self.rts[slot]):
+                self.window_rts -= 1
+                self.rt_sum -= self.rts[slot]
+                self.rt_sum_squares -= self.rts[slot] ** 2
+        rt = math.nan if no_response else float(response_time)
+        self.correct[slot] = int(correct)
+        self.rts[slot] = rt
+        self.window_correct += int(correct)
+        if not no_response:
+            self.window_rts += 1
+            self.rt_sum += rt
+            self.rt_sum_squares += rt ** 2
+        self.n_trials += 1
+        self.n_correct += int(correct)
+
+        if self.context is not None and context != self.context:
+            self.since_switch = 0
+            self.run = 0
+        self.context = context
+        if self.since_switch is not None:
+            self.since_switch += 1
+            self.run = self.run + 1 if correct else 0
+            if self.run == self.recovery_run:
+                self.recovery.append(self.since_switch)
+                self.since_switch = None
+
+    def snapshot(self):
+        """Current statistics as a JSON-serializable dict."""
+        n_window = min(self.n_trials, self.window)
+        rt_mean = self.rt_sum / self.window_rts if self.window_rts else math.nan
+        rt_variance = self.rt_sum_squares / self.window_rts - rt_mean ** 2 if self.window_rts else math.nan
+        return {
+            'trial': self.n_trials,
+            'accuracy': self.n_correct / self.n_trials if self.n_trials else math.nan,
+            'window_accuracy': self.window_correct / n_window if n_window else math.nan,
+            'rt_mean': rt_mean,
+            'rt_sd': math.sqrt(max(rt_variance, 0.0)) if self.window_rts else math.nan,
+            'context': self.context,
+            'since_switch': self.since_switch,
+            'recovery': self.recovery,
+        }
+
+
+class MonitorPublisher:
+    """Sends snapshots as datagrams to the monitor address without ever blocking."""
+
+    def __init__(self, setting=None):
+        family, self.address = monitor_address(setting)
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def publish(self, snapshot):
+        try:
+            self.socket.sendto(json.dumps(snapshot).encode(), self.address)
+        except OSError:
+            pass  # No listener, or its buffer is full: the update is dropped
+
+    def close(self):
+        self.socket.close()
+
+
+def format_snapshot(snapshot):
+    line = (f"trial {snapshot['trial']:>3}  accuracy {snapshot['accuracy']:.2f}  "
+            f"last {WINDOW} {snapshot['window_accuracy']:.2f}  RT {snapshot['rt_mean']:.3f} ± {snapshot['rt_sd']:.3f} s  "
+            f"context {snapshot['context']}")
+    if snapshot['since_switch'] is not None:
+        line += f"  {snapshot['since_switch']} trials since switch"
+    if snapshot['recovery']:
+        line += f"  recovered in {snapshot['recovery']}"
+    return line
+
+
+def listen(setting=None):
+    """Print every snapshot sent to the monitor address until interrupted."""
+    family, address = monitor_address(setting)
+    listener = socket.socket(family, socket.SOCK_DGRAM)
+    if family != socket.AF_INET and os.path.exists(address):
+        os.unlink(address)  # Left behind by an earlier listener
+    listener.bind(address)
+    print(f"Listening on {address}")
+    try:
+        while True:
+            print(format_snapshot(json.loads(listener.recv(MAX_DATAGRAM))), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if family != socket.AF_INET:
+            os.unlink(address)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--address', default=None, help=f'UNIX socket path or UDP port (default: ${MONITOR_ENV} or {MONITOR_SOCKET})')
+    args = parser.parse_args(argv)
+    listen(args.address)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Optional per-phase wall time, CPU time and allocation profiling of the trial loop.
+
+Enabled with the HDMTASK_PROFILE environment variable: '1' records times and call counts,
+'memory' also traces allocations with tracemalloc. When disabled every phase() returns the
+same no-op context manager, so the instrumentation can stay in the trial loop.
+"""
+
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+PROFILE_ENV = 'HDMTASK_PROFILE'
+N_TOP_ALLOCATIONS = 10
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class PhaseStats:
+    """Accumulated cost of one phase."""
+
+    __slots__ = ('calls', 'wall', 'cpu', 'max_wall', 'allocated', 'peak')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0
+        self.cpu = 0
+        self.max_wall = 0
+        self.allocated = 0
+        self.peak = 0
+
+    def as_dict(self):
+        calls = max(self.calls, 1)
+        return {
+            'calls': self.calls,
+            'wall_ms': self.wall / 1e6,
+            'cpu_ms': self.cpu / 1e6,
+            'mean_wall_ms': self.wall / calls / 1e6,
+            'max_wall_ms': self.max_wall / 1e6,
+            'allocated_bytes': self.allocated,
+            'peak_bytes': self.peak,
+        }
+
+
+class _Phase:
+    """Context manager timing one run of a phase."""
+
+    __slots__ = ('stats', 'trace_memory', 'wall', 'cpu', 'memory')
+
+    def __init__(self, stats, trace_memory):
+        self.stats = stats
+        self.trace_memory = trace_memory
+
+    def __enter__(self):
+        if self.trace_memory:
+            self.memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.cpu = time.process_time_ns()
+        self.wall = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter_ns() - self.wall
+        cpu = time.process_time_ns() - self.cpu
+        stats = self.stats
+        stats.calls += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        if wall > stats.max_wall:
+            stats.max_wall = wall
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stats.allocated += current - self.memory
+            stats.peak = max(stats.peak, peak - self.memory)
+        return False
+
+
+class PhaseProfiler:
+    """Per-phase timings of a session, written to a JSON sidecar of the data file."""
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stats = {}
+        self.snapshots = []
+        self.startup = {}
+        self.closed = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls):
+        setting = os.environ.get(PROFILE_ENV, '').strip().lower()
+        return cls(enabled=setting not in ('', '0', 'false', 'off'), trace_memory=setting == 'memory')
+
+    def phase(self, name):
+        """Context manager adding the time spent in its block to the phase name."""
+        if not self.enabled:
+            return _NULL_PHASE
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PhaseStats()
+        return _Phase(stats, self.trace_memory)
+
+    def snapshot(self, label):
+        """Record the top allocation sites, if allocations are traced."""
+        if not self.trace_memory:
+            return
+        top = tracemalloc.take_snapshot().statistics('lineno')[:N_TOP_ALLOCATIONS]
+        self.snapshots.append({
+            'label': label,
+            'traced_bytes': tracemalloc.get_traced_memory()[0],
+            'top': [{'site': str(stat.traceback), 'bytes': stat.size, 'count': stat.count} for stat in top],
+        })
+
+    def results(self):
+        return {
+            'phases': {name: stats.as_dict() for name, stats in self.stats.items()},
+            'snapshots': self.snapshots,
+            'startup': self.startup,
+        }
+
+    def summary(self):
+        lines = [f"{'phase':<16} {'calls':>7} {'wall ms':>10} {'cpu ms':>10} {'mean ms':>9} {'max ms':>9} {'alloc kB':>9}"]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].wall):
+            row = stats.as_dict()
+            lines.append(f"{name:<16} {row['calls']:>7} {row['wall_ms']:>10.1f} {row['cpu_ms']:>10.1f} "
+                         f"{row['mean_wall_ms']:>9.3f} {row['max_wall_ms']:>9.3f} {row['allocated_bytes'] / 1024:>9.1f}")
+        return '\n'.join(lines)
+
+    def close(self, sidecar_path):
+        """Write the results to sidecar_path and print the summary, once."""
+        if not self.enabled or self.closed:
+            return
+        self.closed = True
+        with open(sidecar_path, 'w', encoding='utf-8') as sidecar:
+            json.dump(self.results(), sidecar, indent=1)
+        print(f"Phase profile written to {sidecar_path}")
+        print(self.summary())
+        if self.trace_memory:
+            tracemalloc.stop()
+
+
+def sidecar_path(csv_path):
+    """Path of the profile sidecar of a data file."""
+    return os.path.splitext(csv_path)[0] + '_profile.json'
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Fixed-schema, columnar store of the trial rows of a session.
+
+TrialBuffer holds a session in a NumPy structured array allocated for every trial up front.
+Text columns are stored as small integer codes into CATEGORIES, fields a trial does not
+record (the ITI of self-guided trials, frame statistics of simulated ones) are NaN or -1,
+so every session has the same columns and dtypes. It can be written as Parquet when pyarrow
+is installed, or turned into a pandas frame with categorical columns.
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+
+from hdmtask.schedule import CHOICES, DIFFICULTIES
+
+HAVE_ARROW = importlib.util.find_spec('pyarrow') is not None
+MISSING_CODE = -1
+
+# Levels of the text columns; a column holds the index of its value in this tuple
+CATEGORIES = {
+    'majority_color': ('red', 'yellow'),
+    'correct': ('correct', 'no response', 'incorrect'),
+    'chosen_color': ('red', 'yellow', 'No Response'),
+    'chosen_image': CHOICES + ('No Response',),
+    'difficulty': DIFFICULTIES,
+    'render_backend': ('circle', 'sprite', 'pixels'),  # Names of render.BACKENDS
+}
+
+PHASES = ('dots', 'isi', 'images', 'response', 'feedback', 'color', 'iti')
+
+TRIAL_FIELDS = [
+    ('proportion_diff', np.float64),
+    ('majority_color', np.int8),
+    ('isi_duration', np.float64),
+    ('iti_duration', np.float64),
+    ('correct', np.int8),
+    ('response_time', np.float64),
+    ('chosen_color', np.int8),
+    ('current_context', np.int8),
+    ('running_score', np.float64),
+    ('correct_binary', np.int8),
+    ('chosen_image', np.int8),
+    ('difficulty', np.int8),
+    ('seed', np.int64),
+    ('trial_onset', np.float64),
+    ('render_backend', np.int8),
+    ('dot_update_ms', np.float64),
+    ('dot_render_ms', np.float64),
+    ('dot_frame_max_ms', np.float64),
+    ('n_frames', np.int32),
+    ('dropped_frames', np.int32),
+    ('max_frame_interval', np.float64),
+    ('quest_threshold', np.float64),
+    ('quest_sd', np.float64),
+] + [(f'{phase}_{kind}', np.float64) for phase in PHASES for kind in ('intended', 'achieved')]
+
+TRIAL_DTYPE = np.dtype(TRIAL_FIELDS)
+
+_CODES = {name: {level: code for code, level in enumerate(levels)} for name, levels in CATEGORIES.items()}
+
+
+def _empty_rows(n_trials):
+    """Rows with every field missing: NaN for floats, -1 for integers and category codes."""
+    rows = np.empty(n_trials, dtype=TRIAL_DTYPE)
+    for name, dtype in TRIAL_FIELDS:
+        rows[name] = np.nan if np.dtype(dtype).kind == 'f' else MISSING_CODE
+    return rows
+
+
+class TrialBuffer:
+    """Trial rows of a session in a preallocated structured array, one element per trial."""
+
+    def __init__(self, n_trials):
+        self.rows = _empty_rows(n_trials)
+        self.n_recorded = 0
+        self.dropped = set()
+
+    def __len__(self):
+        return self.n_recorded
+
+    def record(self, trial_number, trial_data):
+        """Store a trial_record() row, encoding its text fields.
+
+        This runs during the session, so fields outside the schema, unknown text values and
+        values of the wrong type are left out of the buffer (the CSV still has them) with one
+        warning each, rather than raising.
+        """
+        row = self.rows[trial_number]
+        for name, value in trial_data.items():
+            if value is None:
+                continue  # Left missing
+            if name not in TRIAL_DTYPE.fields:
+                self.drop(name, f"{name!r} is not a trial record field")
+                continue
+            codes = _CODES.get(name)
+            if codes is None:
+                try:
+                    row[name] = value
+                except (TypeError, ValueError):
+                    self.drop(name, f"{value!r} does not fit the {TRIAL_DTYPE[name]} field {name!r}")
+            elif value in codes:
+                row[name] = codes[value]
+            else:
+                self.drop((name, value), f"{value!r} is not a level of {name!r}")
+        self.n_recorded = max(self.n_recorded, trial_number + 1)
+
+    def drop(self, key, message):
+        if key not in self.dropped:
+            self.dropped.add(key)
+            print(f"{message}; left out of the Parquet copy")
+
+    def append(self, trial_data):
+        self.record(self.n_recorded, trial_data)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build a buffer from a DataFrame of a data file, e.g. a CSV read back with pandas."""
+        buffer = cls(len(frame))
+        for name in TRIAL_DTYPE.names:
+            if name not in frame:
+                continue
+            column = frame[name]
+            if name in CATEGORIES:
+                column = column.astype(object).map(_CODES[name])
+            if TRIAL_DTYPE[name].kind != 'f':
+                column = column.fillna(MISSING_CODE)
+            buffer.rows[name] = column.to_numpy()
+        buffer.n_recorded = len(frame)
+        return buffer
+
+    @property
+    def data(self):
+        """The structured array of the recorded trials."""
+        return self.rows[:self.n_recorded]
+
+    def column(self, name):
+        """Values of a column, with category codes decoded to their levels (None if missing)."""
+        values = self.data[name]
+        if name not in CATEGORIES:
+            return values
+        levels = np.array(CATEGORIES[name] + (None,), dtype=object)
+        return levels[values]  # Code -1 picks the trailing None
+
+    def to_frame(self):
+        """Return the recorded trials as a pandas DataFrame with categorical text columns."""
+        import pandas as pd
+
+        data = self.data
+        return pd.DataFrame({
+            name: pd.Categorical.from_codes(data[name], CATEGORIES[name]) if name in CATEGORIES else data[name]
+            for name in TRIAL_DTYPE.names
+        })
+
+    def to_arrow(self):
+        """Return the recorded trials as a pyarrow Table with dictionary-encoded text columns."""
+        import pyarrow as pa
+
+        data = self.data
+        columns = {}
+        for name in TRIAL_DTYPE.names:
+            if name in CATEGORIES:
+                codes = data[name]
+                columns[name] = pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes == MISSING_CODE), pa.array(CATEGORIES[name]))
+            else:
+                columns[name] = pa.array(data[name])
+        return pa.table(columns)
+
+    def write_parquet(self, path):
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+
+
+def parquet_path(csv_path):
+    """Path of the Parquet copy of a data file."""
+    return os.path.splitext(csv_path)[0] + '.parquet'
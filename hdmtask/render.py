@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Rendering backends for drawing the dot cloud."""
+
+import os
+
+import numpy as np
+import pygame
+
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+
+
+class CircleBackend:
+    """Reference backend: one pygame.draw.circle call per dot."""
+
+    name = 'circle'
+
+    def __init__(self, dot_radius):
+        self.dot_radius = dot_radius
+
+    def draw(self, surface, xs, ys, is_red):
+        for x, y, red in zip(xs.tolist(), ys.tolist(), is_red.tolist()):
+            pygame.draw.circle(surface, RED if red else YELLOW, (x, y), self.dot_radius)
+
+
+class SpriteBackend:
+    """Pre-renders one red and one yellow dot sprite and draws the cloud with Surface.blits()."""
+
+    name = 'sprite'
+
+    def __init__(self, dot_radius):
+        self.dot_radius = dot_radius
+        self.sprites = None
+        self.sources = None
+        self.sources_is_red = None
+
+    def make_sprites(self):
+        """Render the dot sprites, converted to the display format once a display exists."""
+        size = 2 * self.dot_radius + 1
+        sprites = []
+        for color in (YELLOW, RED):
+            sprite = pygame.Surface((size, size))
+            sprite.fill((0, 0, 0))
+            sprite.set_colorkey((0, 0, 0))
+            pygame.draw.circle(sprite, color, (self.dot_radius, self.dot_radius), self.dot_radius)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprites.append(sprite)
+        # Indexed by is_red, so 0 is yellow and 1 is red
+        self.sprites = np.empty(2, dtype=object)
+        self.sprites[:] = sprites
+
+    def draw(self, surface, xs, ys, is_red):
+        if self.sprites is None:
+            self.make_sprites()
+        # Dot colors are fixed for a cloud, so the sprite list is only rebuilt for a new one
+        if is_red is not self.sources_is_red:
+            self.sources = self.sprites[is_red.view(np.uint8)].tolist()
+            self.sources_is_red = is_red
+        dests = zip((xs - self.dot_radius).tolist(), (ys - self.dot_radius).tolist())
+        surface.blits(zip(self.sources, dests), doreturn=False)
+
+
+class PixelArrayBackend:
+    """Stamps the dots directly into the surface's pixel buffer through pygame.surfarray."""
+
+    name = 'pixels'
+
+    def __init__(self, dot_radius):
+        self.dot_radius = dot_radius
+        self.mapped_colors = None
+        self.px = None
+
+        # Take the disc footprint from pygame.draw.circle so the dots look the same as
+        # with the other backends
+        size = 2 * dot_radius + 1
+        stamp = pygame.Surface((size, size))
+        stamp.fill((0, 0, 0))
+        pygame.draw.circle(stamp, (255, 255, 255), (dot_radius, dot_radius), dot_radius)
+        dx, dy = np.nonzero(pygame.surfarray.array_red(stamp))
+        self.dx = dx - dot_radius
+        self.dy = dy - dot_radius
+
+    def allocate_buffers(self, n_dots):
+        """(n_dots, stamp pixels) buffers, reused while the dot count stays the same.
+
+        The stamp offsets are tiled to the full shape because ufuncs allocate an iteration
+        buffer for broadcast operands.
+        """
+        shape = (n_dots, len(self.dx))
+        self.tiled_dx = np.tile(self.dx, (n_dots, 1))
+        self.tiled_dy = np.tile(self.dy, (n_dots, 1))
+        self.px = np.empty(shape, dtype=np.intp)
+        self.py = np.empty(shape, dtype=np.intp)
+        self.flat_index = np.empty(shape, dtype=np.intp)
+        self.colors_is_red = None
+
+    def draw(self, surface, xs, ys, is_red):
+        if self.mapped_colors is None:
+            self.mapped_colors = np.array([surface.map_rgb(YELLOW), surface.map_rgb(RED)], dtype=np.uint32)
+        if self.px is None or len(self.px) != len(xs):
+            self.allocate_buffers(len(xs))
+        # Dot colors are fixed for a cloud, so the stamp colors are only rebuilt for a new one
+        if is_red is not self.colors_is_red:
+            self.colors = np.repeat(self.mapped_colors[is_red.view(np.uint8)][:, None], len(self.dx), axis=1)
+            self.colors_is_red = is_red
+        width, height = surface.get_size()
+        px, py = self.px, self.py
+        np.copyto(px, xs[:, None])
+        np.add(px, self.tiled_dx, out=px)
+        np.maximum(px, 0, out=px)
+        np.minimum(px, width - 1, out=px)
+        np.copyto(py, ys[:, None])
+        np.add(py, self.tiled_dy, out=py)
+        np.maximum(py, 0, out=py)
+        np.minimum(py, height - 1, out=py)
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        if pixels.T.flags.c_contiguous:
+            # pixels2d is the (width, height) transpose of the row-major pixel buffer, so
+            # without row padding it can be written through one flat index
+            np.multiply(py, width, out=self.flat_index)
+            np.add(self.flat_index, px, out=self.flat_index)
+            pixels.T.reshape(-1)[self.flat_index] = self.colors
+        else:
+            pixels[px, py] = self.colors
+        del pixels  # Unlock the surface before it is blitted or flipped
+
+
+BACKENDS = {
+    CircleBackend.name: CircleBackend,
+    SpriteBackend.name: SpriteBackend,
+    PixelArrayBackend.name: PixelArrayBackend,
+}
+
+# Backend of the task: the only one whose steady-state frames allocate nothing, as the sprite
+# and circle backends hand pygame one Python object per dot every frame
+DEFAULT_BACKEND = PixelArrayBackend.name
+BACKEND_ENV = 'HDMTASK_RENDER_BACKEND'  # Backend name overriding DEFAULT_BACKEND, to compare them in sessions
+
+
+def make_backend(name, dot_radius):
+    """Create the dot rendering backend registered under name."""
+    try:
+        return BACKENDS[name](dot_radius)
+    except KeyError:
+        raise ValueError(f"Unknown render backend {name!r}, expected one of {sorted(BACKENDS)}")
+
+
+def backend_from_env(dot_radius=4):
+    """Name of the backend set by BACKEND_ENV, DEFAULT_BACKEND if it is not set.
+
+    Raises ValueError for a name that is not in BACKENDS.
+    """
+    name = os.environ.get(BACKEND_ENV, '').strip().lower() or DEFAULT_BACKEND
+    make_backend(name, dot_radius)
+    return name
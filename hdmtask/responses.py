@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Event-driven keyboard response collection."""
+
+import pygame
+
+from hdmtask.timing import now
+
+ARROW_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)
+
+
+class ResponseCollector:
+    """Blocks on pygame.event.wait() for a keypress instead of spinning on pygame.event.get().
+
+    pygame does not expose SDL's event timestamps, so a response is timed by reading clock
+    as soon as event.wait() returns the key event. That is within about a millisecond of SDL
+    receiving the key press; keyboard and OS input latency come on top. Escape or closing the
+    window calls on_quit().
+    """
+
+    def __init__(self, on_quit, clock=now):
+        self.on_quit = on_quit
+        self.clock = clock
+
+    def wait_for_key(self, keys=None, timeout=None, start_time=None):
+        """Wait for one of keys (any key if None) for up to timeout seconds (forever if None).
+
+        Returns (key, response_time) measured from start_time, or (None, timeout) on a timeout.
+        """
+        if start_time is None:
+            start_time = self.clock()
+
+        while True:
+            # Sleep in SDL until an event arrives or the timeout passes
+            if timeout is None:
+                event = pygame.event.wait()
+            else:
+                remaining = start_time + timeout - self.clock()
+                if remaining <= 0:
+                    return None, timeout
+                event = pygame.event.wait(max(1, int(remaining * 1000)))
+
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self.on_quit()
+            elif event.type == pygame.KEYDOWN and (keys is None or event.key in keys):
+                return event.key, self.clock() - start_time
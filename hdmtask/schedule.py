@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""Deterministic, seedable trial schedules for the dot cloud task."""
+
+import secrets
+from bisect import bisect_right
+from itertools import accumulate
+
+import numpy as np
+
+DIFFICULTIES = ('easiest', 'easy', 'medium', 'hard')
+SCENE_TYPES = ('landscape', 'city')
+FACE_TYPES = ('male', 'female')
+CHOICES = ('male', 'female', 'city', 'landscape')
+N_SWITCHES = 4
+MAX_RUN = 4  # Longest run of trials with the same difficulty
+
+# Defaults of ExperimentInfoDialog
+DEFAULT_EXP_INFO = {
+    "Method": "BEH",
+    "Subject": "",
+    "Block": "0",
+    "EasiestDiff": 0.30,
+    "EasyDiff": 0.18,
+    "MediumDiff": 0.12,
+    "HardDiff": 0.06,
+    "SelfGuided": False,
+    "Tutorial": False,
+    "Adaptive": False,
+    "ITIHigh": 6.0,
+    "ISIHigh": 0.5,
+    "ITILow": 3.0,
+    "ISILow": 0.1,
+    "ResponseWindow": 5.0,
+    "StimuliPres": 1.5,
+}
+
+
+def new_seed():
+    """Draw a fresh 32-bit session seed."""
+    return secrets.randbits(32)
+
+
+def dot_proportions(proportion_diff, majority_red):
+    """Return the (yellow, red) dot proportions for a trial."""
+    if majority_red:
+        red_proportion = 0.5 + proportion_diff / 2
+        yellow_proportion = 1 - red_proportion
+    else:
+        yellow_proportion = 0.5 + proportion_diff / 2
+        red_proportion = 1 - yellow_proportion
+    return yellow_proportion, red_proportion
+
+
+def generate_switch_trials(n_trials, rng):
+    """Pick the trials after which the color-task mapping switches."""
+    switch_trials = []
+    while len(switch_trials) < N_SWITCHES:
+        next_switch = int(rng.integers(round((n_trials/4)-10), round(n_trials/4), endpoint=True))
+        if switch_trials:
+            next_switch += switch_trials[-1]
+
+        if next_switch < n_trials - 5:
+            switch_trials.append(next_switch)
+    return switch_trials
+
+
+def difficulty_pools(block):
+    """Return the (trial pool, switch trial pool) of difficulty levels for a block."""
+    if block == "practice":
+        return ['easiest', 'easiest', 'easiest', 'easiest', 'hard'], ['easy', 'easy', 'easy', 'hard']
+    return ['easiest', 'easy', 'medium', 'hard'], ['easy', 'easy', 'hard', 'hard']
+
+
+def sequence_difficulties(n_trials, difficulty_pool, switch_trials, switch_difficulties, rng, max_run=MAX_RUN):
+    """Generate random difficulties for trials, ensuring no more than max_run consecutive same difficulty.
+
+    Every level starts with round(n_trials/4 + 2) draws per entry in the pool, and switch trials
+    are pinned to their switch difficulty. Every other trial is drawn in proportion to the draws
+    left among the levels that cannot break the run limit, counting pinned trials that follow,
+    so the sequence is built in one pass with no retries. Returns indices into DIFFICULTIES.
+    """
+    counts = [difficulty_pool.count(level) * round((n_trials/4)+2) for level in DIFFICULTIES]
+    in_pool = [count > 0 for count in counts]
+    pins = {trial: DIFFICULTIES.index(level) for trial, level in zip(switch_trials, switch_difficulties)}
+    draws = rng.random(n_trials)
+
+    sequence = np.empty(n_trials, dtype=np.int8)
+    last_level, run = -1, 0
+    for trial in range(n_trials):
+        level = pins.get(trial)
+        if level is None:
+            # Length of the run of pinned trials right after this one
+            pinned_level = pins.get(trial + 1)
+            pinned_run = 0
+            while pins.get(trial + 1 + pinned_run, -1) == pinned_level:
+                pinned_run += 1
+
+            weights = [0] * len(DIFFICULTIES)
+            for candidate in range(len(DIFFICULTIES)):
+                candidate_run = (run if candidate == last_level else 0) + 1
+                if candidate == pinned_level:
+                    candidate_run += pinned_run
+                if in_pool[candidate] and candidate_run <= max_run:
+                    weights[candidate] = counts[candidate]
+            if not any(weights):
+                # The allowed levels have no draws left, so fall back to picking them evenly
+                weights = [1 if in_pool[candidate] and candidate != last_level else 0 for candidate in range(len(DIFFICULTIES))]
+            if not any(weights):
+                weights = [int(pooled) for pooled in in_pool]
+
+            cumulative_weights = list(accumulate(weights))
+            level = bisect_right(cumulative_weights, draws[trial] * cumulative_weights[-1])
+
+        sequence[trial] = level
+        if counts[level] > 0:
+            counts[level] -= 1
+        run = run + 1 if level == last_level else 1
+        last_level = level
+
+    return sequence
+
+
+def longest_run(sequence):
+    """Length of the longest run of equal consecutive values."""
+    longest = run = 0
+    previous = None
+    for value in sequence:
+        run = run + 1 if value == previous else 1
+        longest = max(longest, run)
+        previous = value
+    return longest
+
+
+def read_timing_file(path):
+    """Read an ISI/ITI timing file of alternating ISI and ITI lines. Returns (isi, iti) lists."""
+    values = []
+    with open(path) as file:
+        for line in file:
+            try:
+                values.append(float(line))
+            except ValueError:
+                print(f"Could not convert to float: {line}")
+    return values[0::2], values[1::2]
+
+
+def choice_layout(rng):
+    """Randomize the icon positions: indices into CHOICES for the up, down, left and right slots."""
+    layout = list(range(len(CHOICES)))
+    # Faces stay on one axis and scenes on the other
+    layout[0:2] = rng.permutation(layout[0:2])
+    layout[2:4] = rng.permutation(layout[2:4])
+    if rng.integers(2):
+        layout = layout[::-1]
+    return layout
+
+
+class TrialSchedule:
+    """Array-backed schedule of every random choice in one session.
+
+    Each field is an array with one entry per trial. Building a schedule only needs a seed and
+    the exp_info dict from ExperimentInfoDialog, so it runs before pygame starts and the same
+    seed always reproduces the same session.
+    """
+
+    FIELDS = ('difficulty', 'proportion_diff', 'majority_red', 'context', 'isi', 'iti',
+              'scene_type', 'scene_index', 'face_type', 'face_index', 'face_on_top', 'choice_layout')
+
+    def __init__(self, seed, switch_trials, **fields):
+        self.seed = seed
+        self.switch_trials = list(switch_trials)
+        for name in self.FIELDS:
+            setattr(self, name, fields[name])
+
+    def __len__(self):
+        return len(self.difficulty)
+
+    @classmethod
+    def build(cls, exp_info, n_trials, n_images, isi_durations=None, iti_durations=None, seed=None):
+        """Build a schedule.
+
+        n_images maps 'rural', 'urban', 'male' and 'female' to the number of images of each kind.
+        isi_durations and iti_durations are the timing file values used for fMRI sessions.
+        """
+        if seed is None:
+            seed = new_seed()
+        rng = np.random.default_rng(seed)
+        block = exp_info['Block']
+
+        switch_trials = generate_switch_trials(n_trials, rng)
+        difficulty_pool, switch_pool = difficulty_pools(block)
+        switch_difficulties = list(rng.permutation(switch_pool))
+        difficulty = sequence_difficulties(n_trials, difficulty_pool, switch_trials, switch_difficulties, rng)
+
+        level_diffs = np.array([exp_info['EasiestDiff'], exp_info['EasyDiff'], exp_info['MediumDiff'], exp_info['HardDiff']])
+        majority_red = rng.integers(2, size=n_trials).astype(bool)
+
+        # The mapping switches after each switch trial
+        switched = np.zeros(n_trials, dtype=np.int8)
+        switched[[trial + 1 for trial in switch_trials if trial + 1 < n_trials]] = 1
+        context = np.where(np.cumsum(switched) % 2 == 0, 1, 2).astype(np.int8)
+        if rng.integers(2):
+            context = (3 - context).astype(np.int8)
+
+        if exp_info['Method'] == 'fMRI':
+            isi = np.asarray(isi_durations[:n_trials], dtype=float)
+        else:
+            isi = rng.uniform(exp_info['ISILow'], exp_info['ISIHigh'], n_trials)
+        if exp_info['SelfGuided']:
+            iti = np.full(n_trials, np.nan)
+        elif exp_info['Method'] == 'fMRI':
+            iti = np.asarray(iti_durations[:n_trials], dtype=float)
+        else:
+            iti = rng.uniform(exp_info['ITILow'], exp_info['ITIHigh'], n_trials)
+
+        scene_type = rng.integers(2, size=n_trials).astype(np.int8)
+        face_type = rng.integers(2, size=n_trials).astype(np.int8)
+        n_scenes = np.where(scene_type == 0, n_images['rural'], n_images['urban'])
+        n_faces = np.where(face_type == 0, n_images['male'], n_images['female'])
+
+        return cls(
+            seed,
+            switch_trials,
+            difficulty=difficulty,
+            proportion_diff=level_diffs[difficulty],
+            majority_red=majority_red,
+            context=context,
+            isi=isi,
+            iti=iti,
+            scene_type=scene_type,
+            scene_index=rng.integers(n_scenes).astype(np.int32),
+            face_type=face_type,
+            face_index=rng.integers(n_faces).astype(np.int32),
+            face_on_top=rng.integers(2, size=n_trials).astype(bool),
+            choice_layout=np.array([choice_layout(rng) for _ in range(n_trials)], dtype=np.int8),
+        )
+
+
+def validate_schedule(schedule, block, max_run=MAX_RUN):
+    """Return a list of the constraints a schedule breaks, empty if it is valid.
+
+    Checks the number of switches, that the mapping changes right after each switch trial
+    and nowhere else, the longest run of one difficulty and the difficulty pools of the block.
+    """
+    problems = []
+    n_trials = len(schedule)
+    if len(schedule.switch_trials) != N_SWITCHES:
+        problems.append(f"{len(schedule.switch_trials)} switch trials instead of {N_SWITCHES}")
+    changes = [trial - 1 for trial in np.flatnonzero(np.diff(schedule.context)) + 1]
+    if changes != [trial for trial in schedule.switch_trials if trial + 1 < n_trials]:
+        problems.append(f"mapping changes after trials {changes}, switch trials are {schedule.switch_trials}")
+    run = longest_run(schedule.difficulty)
+    if run > max_run:
+        problems.append(f"difficulty run of {run} trials")
+
+    difficulty_pool, switch_pool = difficulty_pools(block)
+    levels = {DIFFICULTIES[level] for level in schedule.difficulty}
+    if not levels <= set(difficulty_pool) | set(switch_pool):
+        problems.append(f"difficulties {sorted(levels - set(difficulty_pool) - set(switch_pool))} outside the {block} pools")
+    switch_levels = sorted(DIFFICULTIES[schedule.difficulty[trial]] for trial in schedule.switch_trials)
+    if switch_levels != sorted(switch_pool[:len(schedule.switch_trials)]):
+        problems.append(f"switch trial difficulties {switch_levels} do not match the pool {sorted(switch_pool)}")
+    return problems
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Scoring rules and trial data rows shared by the task and the simulated participant."""
+
+import math
+
+from hdmtask.schedule import DIFFICULTIES, dot_proportions
+
+FEATURE_CHOICES = {'face': ('male', 'female'), 'scene': ('city', 'landscape')}
+FEEDBACK = {'correct': 'Correct', 'no response': 'Miss', 'incorrect': 'Incorrect'}
+
+
+def attended_feature(context, majority_red):
+    """Return the feature ('face' or 'scene') that the majority color points to in a context.
+
+    In context 1 red means face and yellow means scene; context 2 swaps the mapping.
+    """
+    return 'face' if (context == 1) == bool(majority_red) else 'scene'
+
+
+def is_correct(context, majority_red, chosen_option, face_type, scene_type):
+    """Return 1 if chosen_option names the attended image of the trial, else 0."""
+    target = face_type if attended_feature(context, majority_red) == 'face' else scene_type
+    return int(chosen_option == target)
+
+
+def outcome(correct, no_response):
+    """Return 'correct', 'no response' or 'incorrect', the value of the 'correct' data column."""
+    if correct:
+        return 'correct'
+    if no_response:
+        return 'no response'
+    return 'incorrect'
+
+
+def trial_record(schedule, trial_number, n_red, n_yellow, chosen_option, response_time, chosen_color, correct, no_response, score,
+                 adaptive=False):
+    """Return the data row of a trial with the columns of the original data file, in order.
+
+    In adaptive sessions QUEST sets the proportion difference, so the scheduled difficulty
+    level does not apply and 'difficulty' is None (an empty cell in the CSV).
+    """
+    yellow_proportion, red_proportion = dot_proportions(schedule.proportion_diff[trial_number], schedule.majority_red[trial_number])
+    trial_data = {
+        'proportion_diff': abs(yellow_proportion - red_proportion),
+        'majority_color': 'red' if n_red > n_yellow else 'yellow',
+        'isi_duration': float(schedule.isi[trial_number]),
+    }
+    # Self-guided sessions have no fixed ITI
+    if not math.isnan(schedule.iti[trial_number]):
+        trial_data['iti_duration'] = float(schedule.iti[trial_number])
+    trial_data['correct'] = outcome(correct, no_response)
+    trial_data['response_time'] = float(response_time)
+    trial_data['chosen_color'] = chosen_color
+    trial_data['current_context'] = int(schedule.context[trial_number])
+    trial_data['running_score'] = score / (trial_number + 1)
+    trial_data['correct_binary'] = correct
+    trial_data['chosen_image'] = chosen_option
+    trial_data['difficulty'] = None if adaptive else DIFFICULTIES[schedule.difficulty[trial_number]]
+    trial_data['seed'] = schedule.seed
+    return trial_data
@@ -0,0 +1,636 @@
+# -*- coding: utf-8 -*-
+"""One session of the dot cloud task: tutorial, trial loop and data file.
+
+Imports pygame and NumPy, so hdmtask.task imports it on a background thread while the
+experiment info dialog is open.
+"""
+
+import atexit
+import os
+import random
+import sys
+from datetime import datetime
+
+import numpy as np
+import pygame
+
+from hdmtask import timing
+from hdmtask.adaptive import Quest
+from hdmtask.batch import N_TRIALS, SESSION_BUNDLE, load_session
+from hdmtask.compose import DIRECTIONS, compose_choices, compose_scene_with_face, make_frame
+from hdmtask.datalog import TrialWriter
+from hdmtask.display import DisplayUpdater
+from hdmtask.dotcloud import DotCloud
+from hdmtask.frames import FrameScheduler, open_display
+from hdmtask.itifiles import TimingIndex
+from hdmtask.monitor import MonitorPublisher, PerformanceMonitor
+from hdmtask.profiling import PhaseProfiler, sidecar_path
+from hdmtask.render import backend_from_env
+from hdmtask.responses import ARROW_KEYS, ResponseCollector
+from hdmtask.schedule import CHOICES, FACE_TYPES, SCENE_TYPES, TrialSchedule, dot_proportions, validate_schedule
+from hdmtask.scoring import FEEDBACK, is_correct, outcome, trial_record
+from hdmtask.stimuli import StimulusLoader, StimulusStore, list_images
+from hdmtask.text import TextCache
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+GREY = (128, 128, 128)
+ORANGE = (255, 165, 0)
+GREEN = (0, 255, 0)
+
+# Dot rendering backend: 'circle' (one draw call per dot), 'sprite' (pre-rendered
+# sprites drawn with Surface.blits) or 'pixels' (stamped into the surfarray pixel buffer).
+# Set HDMTASK_RENDER_BACKEND to compare them; the default is render.DEFAULT_BACKEND
+RENDER_BACKEND = backend_from_env()
+
+# Feedback text and its color
+FEEDBACK_FONT_SIZE = 100
+FEEDBACK_COLORS = {'Correct': GREEN, 'Miss': ORANGE, 'Incorrect': RED}
+
+
+def icon_paths(icon_folder):
+    """Return the paths of the icons for the four choices."""
+    return [os.path.join(icon_folder, f"{choice}.png") for choice in CHOICES]
+
+def load_icons(icon_folder, stimulus_store):
+    """Load icons for choices from a folder and return a dictionary with icons."""
+    icons = {}
+    for choice, icon_path in zip(CHOICES, icon_paths(icon_folder)):
+        if os.path.exists(icon_path):
+            # Scale the icon down to 15% of its original size
+            icons[choice] = stimulus_store.get(icon_path, 0.15)
+        else:
+            print(f"Warning: Icon for {choice} not found at {icon_path}")
+    
+    return icons
+
+
+class Stimuli:
+    """Scene, face and icon images of the task folder, decoded on a thread pool.
+
+    The icons are decoded as soon as the folder is indexed, the scenes and faces once
+    schedule() knows which ones the session shows, so only the session's images are held in
+    memory. The store turns the decoded buffers into surfaces when they are first used,
+    once the display exists.
+    """
+
+    def __init__(self, root):
+        self.rural_scenes = list_images(root + '\\Scenes\\rural')
+        self.urban_scenes = list_images(root + '\\Scenes\\urban')
+        self.male_faces = list_images(root + '\\Faces\\male')
+        self.female_faces = list_images(root + '\\Faces\\female')
+        self.icon_folder = root + '\\Icons'  # Adjust the path to your icons folder
+        self.scene_paths = self.face_paths = None
+
+        self.loader = StimulusLoader()
+        self.loader.submit([path for path in icon_paths(self.icon_folder) if os.path.exists(path)])
+        self.store = StimulusStore(loader=self.loader)
+
+    def schedule(self, schedule):
+        """Set the scene and face paths of every trial of a TrialSchedule and start decoding them."""
+        self.scene_paths = [(self.rural_scenes if SCENE_TYPES[scene_type] == 'landscape' else self.urban_scenes)[index]
+                            for scene_type, index in zip(schedule.scene_type, schedule.scene_index)]
+        self.face_paths = [(self.male_faces if FACE_TYPES[face_type] == 'male' else self.female_faces)[index]
+                           for face_type, index in zip(schedule.face_type, schedule.face_index)]
+        self.loader.submit(self.scene_paths, grayscale=True)
+        self.loader.submit(self.face_paths)
+
+
+def draw_example_dot_cloud(win, win_size):
+    """Draw an example dot cloud on the screen."""
+    n_dots = 600
+    dot_radius = 4
+    view_radius = min(win_size) // 6
+    win_center_x, win_center_y = win_size[0] // 2, win_size[1] // 2 + 100
+
+    n_red = np.random.binomial(n_dots, 0.6)
+    example_cloud = DotCloud(view_radius, (win_center_x, win_center_y), dot_radius, backend=RENDER_BACKEND)
+    example_cloud.reset(n_red, n_dots - n_red, timing.now())
+    example_cloud.render(win)
+
+def draw_example_scene_with_face(win, win_size, stimuli):
+    """Draw an example scene with a face either overlayed or placed above/below the scene on the screen."""
+
+    # Select random images
+    scene_type = random.choice(['landscape', 'city'])
+    face_type = random.choice(['male', 'female'])
+
+    # Both images are scaled to 50% of their original size; scenes are shown in grayscale
+    if scene_type == 'landscape':
+        scene_image = stimuli.store.get(random.choice(stimuli.rural_scenes), 0.5, grayscale=True)
+    else:
+        scene_image = stimuli.store.get(random.choice(stimuli.urban_scenes), 0.5, grayscale=True)
+    
+    if face_type == 'male':
+        face_image = stimuli.store.get(random.choice(stimuli.male_faces), 0.5)
+    else:
+        face_image = stimuli.store.get(random.choice(stimuli.female_faces), 0.5)
+    
+    # Apply transparency to the face image if it's going to overlay
+    face_on_top = random.choice([True, False])
+    
+    # Calculate positions based on arrangement choice
+    if face_on_top:  # Face above the scene
+        face_rect = face_image.get_rect(midbottom=(win_size[0] // 2, win_size[1] // 2))
+        scene_rect = scene_image.get_rect(midtop=face_rect.midbottom)
+    else:  # Scene above the face
+        scene_rect = scene_image.get_rect(midbottom=(win_size[0] // 2, win_size[1] // 2))
+        face_rect = face_image.get_rect(midtop=scene_rect.midbottom)
+
+    # Clear the window
+    win.fill((128, 128, 128))  # Background color can be adjusted
+    
+    # Draw the images in the specified arrangement
+    win.blit(scene_image, scene_rect)
+    win.blit(face_image, face_rect)
+
+def draw_icons_with_arrows(win, icons, win_size):
+    # Define positions for the icons on the left side
+    icon_positions = {
+        'male': (win_size[0] * 2 // 5, win_size[1] * 2 // 3 - 75),
+        'female': (win_size[0] * 2 // 5, win_size[1] * 2 // 3 + 75),
+        'city': (win_size[0] * 2 // 5 - 100, win_size[1] * 2 // 3),
+        'landscape': (win_size[0] * 2 // 5 + 100, win_size[1] * 2 // 3)
+    }
+
+    # Define positions for the arrows on the right side, closer to the center and lower on the screen
+    arrow_positions = {
+        'up': (win_size[0] * 3 // 5, win_size[1] * 2 // 3 - 75),
+        'down': (win_size[0] * 3 // 5, win_size[1] * 2 // 3 + 75),
+        'left': (win_size[0] * 3 // 5 - 100, win_size[1] * 2 // 3),
+        'right': (win_size[0] * 3 // 5 + 100, win_size[1] * 2 // 3)
+    }
+
+    # Draw the icons
+    for icon_name, position in icon_positions.items():
+        icon_surface = icons[icon_name]
+        icon_rect = icon_surface.get_rect(center=position)
+        win.blit(icon_surface, icon_rect)
+
+    # Draw the triangles (arrows)
+    arrow_size = 20  # Size of the triangle (arrow)
+    for direction, pos in arrow_positions.items():
+        if direction == 'up':
+            points = [(pos[0], pos[1] - arrow_size), (pos[0] - arrow_size, pos[1] + arrow_size), (pos[0] + arrow_size, pos[1] + arrow_size)]
+        elif direction == 'down':
+            points = [(pos[0], pos[1] + arrow_size), (pos[0] - arrow_size, pos[1] - arrow_size), (pos[0] + arrow_size, pos[1] - arrow_size)]
+        elif direction == 'left':
+            points = [(pos[0] - arrow_size, pos[1]), (pos[0] + arrow_size, pos[1] - arrow_size), (pos[0] + arrow_size, pos[1] + arrow_size)]
+        elif direction == 'right':
+            points = [(pos[0] + arrow_size, pos[1]), (pos[0] - arrow_size, pos[1] - arrow_size), (pos[0] - arrow_size, pos[1] + arrow_size)]
+        
+        pygame.draw.polygon(win, BLACK, points)
+
+
+TUTORIAL_SCREENS = [
+    {
+        "title": "Welcome to the Dot Cloud Task",
+        "text": "In this task, you will be presented a cue of colored dots, with the ratio of yellow vs. red varying. You will be tasked with making a judgment of the predominant color.  Press right key to move on.",
+        "type": "dot_cloud",
+    },
+    {
+        "title": "Instructions",
+        "text": "The two colors are mapped to a specific feature, either scenery or face.  The face will be either male or female and the scene will either be city or landscape.  In this task you have to choose whether the scene is landscape/city or whether the face is female/male and the feature you have to attend to depends on the predominant color you determined earlier.",
+        "type": "scene_with_face",
+    },
+    {
+        "title": "Instructions",
+        "text": "The cue-task mapping can be (1) yellow=face and red=scene.  If you think the predominant color in the cue is yellow, you make judgement on whether the face is male or female.  Conversely, if you think the cue is red, you make judgement on whether the scene is city or landscape.",
+        "type": "text",
+    },
+    {
+        "title": "Instructions",
+        "text": "An alternative mapping would be:  (2) yellow=scene, red=face; In a given trial, the cue-task mapping is chosen from the two possible mappings, and it stays the same mapping for around 10-20 trials, then it changes to a different mapping covertly.",
+        "type": "text",
+    },
+    {
+        "title": "Instructions",
+        "text": "Incorrect answers could be due to a wrong perception of the cue (it’s red dominant but you think it’s yellow dominant), or a wrong mapping between cue and task (it’s yellow = scene, but you think it’s yellow = face), or a wrong perception of the task (it’s a female face but you think it’s a male face).",
+        "type": "text",
+    },
+    {
+        "title": "Instructions",
+        "text": "You will choose from the four icons below with arrow keys corresponding to the position of the options as shown below.  After that you will be presented with another response screen that asks you which color you thought was dominant and you will select your choice with either the left or right arrow key.",
+        "type": "icons_with_arrows",
+    },
+    {
+        "title": "Get Ready",
+        "text": "After the feedback, a new trial will start following the same scheme.  Press the Right Key Button to start the task when you're ready.",
+        "type": "text",
+    },
+]
+TUTORIAL_FONT_SIZE = 50
+TUTORIAL_WRAP_WIDTH = 40  # Adjust width as needed
+
+
+# Function to show tutorial screens
+def show_tutorial_screens(win, text_cache, win_size, stimuli, icons, display, responses):
+    for screen in TUTORIAL_SCREENS:
+            win.fill(GREY)
+            
+            # Render title
+            title_surface = text_cache.render(screen["title"], TUTORIAL_FONT_SIZE, BLACK)
+            win.blit(title_surface, (win_size[0]//2 - title_surface.get_width()//2, 50))
+            
+            # Wrap and render text
+            y_offset = 150  # Start Y position for the wrapped text
+            line_height = text_cache.line_height(TUTORIAL_FONT_SIZE) + 10  # Adjust line spacing as needed
+            
+            for text_surface in text_cache.render_wrapped(screen["text"], TUTORIAL_FONT_SIZE, BLACK, TUTORIAL_WRAP_WIDTH):
+                win.blit(text_surface, (win_size[0]//2 - text_surface.get_width()//2, y_offset))
+                y_offset += line_height
+            
+            # Render specific content based on screen type
+            if screen["type"] == "dot_cloud":
+                draw_example_dot_cloud(win, win_size)
+            elif screen["type"] == "scene_with_face":
+                draw_example_scene_with_face(win, win_size, stimuli)
+            elif screen["type"] == "icons_with_arrows":
+                draw_icons_with_arrows(win, icons, win_size)
+            
+            # Render "Next" label
+            next_surface = text_cache.render("Next", TUTORIAL_FONT_SIZE, BLACK)
+            win.blit(next_surface, (win_size[0] - next_surface.get_width() - 50, win_size[1] - next_surface.get_height() - 50))
+            
+            display.show(phase='tutorial')
+            
+            # Wait for right key press
+            responses.wait_for_key([pygame.K_RIGHT])
+
+
+def get_choice_from_key(event_key, directions):
+    """Map the arrow key press to the corresponding direction."""
+    if event_key == pygame.K_UP:
+        return directions[0]  # Up
+    elif event_key == pygame.K_DOWN:
+        return directions[1]  # Down
+    elif event_key == pygame.K_LEFT:
+        return directions[2]  # Left
+    elif event_key == pygame.K_RIGHT:
+        return directions[3]  # Right
+    return None
+
+def display_color_choices(win, win_size, display, responses):
+    """Display red and yellow circles on the left and right of the screen."""
+    # Define the positions for the circles
+    left_position = (win_size[0] // 2 - 150, win_size[1] // 2)
+    right_position = (win_size[0] // 2 + 150, win_size[1] // 2)
+    
+    # Define the circle radius
+    circle_radius = 50
+    
+    # Draw the circles
+    win.fill(GREY)
+    fixation_rect = pygame.draw.rect(win, WHITE, (win_size[0]//2 - 5, win_size[1]//2 - 5, 10, 10))  # Draw fixation square
+    left_rect = pygame.draw.circle(win, RED, left_position, circle_radius)
+    right_rect = pygame.draw.circle(win, YELLOW, right_position, circle_radius)
+    display.show([fixation_rect, left_rect, right_rect], 'color')
+    
+    # Wait for the participant to make a choice, timing out after 3 seconds
+    no_explain = 0
+    key, response_time = responses.wait_for_key([pygame.K_LEFT, pygame.K_RIGHT], 3)
+    if key == pygame.K_LEFT:
+        chosen_color = 'red'
+    elif key == pygame.K_RIGHT:
+        chosen_color = 'yellow'
+    else:
+        chosen_color = 'No Response'
+        no_explain = 1
+    
+    return chosen_color, response_time, no_explain
+
+
+def plan_session(exp_info, stimuli, n_trials=N_TRIALS):
+    """Return the TrialSchedule of a session, before pygame starts.
+
+    Uses the session pre-computed by hdmtask.batch if there is one, otherwise pre-computes
+    every random choice of the session from one seed. Raises ValueError if the schedule
+    breaks its constraints, so a bad bundle or setting stops the task before anything is shown.
+    """
+    subjectid, block = exp_info['Subject'], exp_info['Block']
+    n_images = {'rural': len(stimuli.rural_scenes), 'urban': len(stimuli.urban_scenes),
+                'male': len(stimuli.male_faces), 'female': len(stimuli.female_faces)}
+    schedule = None
+    session_bundle = os.path.join(os.getcwd(), SESSION_BUNDLE)
+    if os.path.exists(session_bundle):
+        schedule = load_session(session_bundle, subjectid, block, exp_info, n_images, n_trials)
+    if schedule is None:
+        # fMRI ISIs and ITIs (Inter-Trial Intervals) come from the subject's timing file
+        isi_duration = iti_duration = None
+        if exp_info['Method'] == "fMRI":
+            timing_index = TimingIndex.load(os.path.join(os.getcwd(), 'QuantumITI_afni'))
+            chosen_ITI_file, isi_duration, iti_duration = timing_index.pick(
+                subjectid, block, n_trials, (exp_info['ISILow'], exp_info['ISIHigh']), (exp_info['ITILow'], exp_info['ITIHigh']))
+            print(f"ITIs chosen from {chosen_ITI_file}")
+        schedule = TrialSchedule.build(exp_info, n_trials, n_images, isi_duration, iti_duration)
+    else:
+        print(f"Session loaded from {session_bundle}")
+    problems = validate_schedule(schedule, block)
+    if problems:
+        raise ValueError(f"Session schedule of subject {subjectid} block {block} is invalid: {'; '.join(problems)}")
+    print(f"Session seed {schedule.seed}")
+    return schedule
+
+
+def run(exp_info, stimuli, schedule, startup):
+    """Run a session with the settings of the experiment info dialog.
+
+    schedule is the session's plan_session() schedule. startup is the timing.StartupTimer of
+    the launch, marked 'dialog_closed' by the caller.
+    """
+    subjectid = exp_info['Subject']
+    method = exp_info['Method']
+    block = exp_info['Block']
+    self_guided = exp_info['SelfGuided']
+    tutorial = exp_info['Tutorial']
+    adaptive = exp_info['Adaptive']
+    stimulipres = exp_info["StimuliPres"]
+    responsewindow = exp_info["ResponseWindow"]
+    stimulus_store = stimuli.store
+
+    # The session's scenes and faces are decoded while the display opens and the tutorial runs
+    stimuli.schedule(schedule)
+
+    # Initialize Pygame after tkinter window is closed
+    pygame.init()
+    pygame.font.init()
+
+    # Save the original screen resolution
+    screen_info = pygame.display.Info()
+    original_resolution = (screen_info.current_w, screen_info.current_h)
+
+    # Set up the Window in fullscreen mode
+    win, vsync, renderer = open_display((screen_info.current_w, screen_info.current_h), pygame.FULLSCREEN | pygame.NOFRAME)
+    win_size = win.get_size()
+    pygame.display.set_caption('Proportion Task')
+    clock = pygame.time.Clock()
+    display = DisplayUpdater(win, renderer)
+    # Per-phase profiling, off unless HDMTASK_PROFILE is set
+    profiler = PhaseProfiler.from_env()
+    frame_scheduler = FrameScheduler(vsync, clock=clock, display=display, profiler=profiler)
+    print(f"Display refresh rate {frame_scheduler.refresh_rate:.1f} Hz, vsync {'on' if frame_scheduler.vsync else 'off'}")
+    startup.mark('display')
+
+    # Load the icons
+    icons = load_icons(stimuli.icon_folder, stimulus_store)
+
+    # Initialize components for Routine
+    currenttime = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+
+    # Trial rows are journaled as they complete; the CSV is rebuilt from the journal at exit,
+    # including when the script dies with an exception. A typed Parquet copy is written next
+    # to it when pyarrow is installed
+    n_trials = len(schedule)
+    trial_writer = TrialWriter(os.getcwd() + f"/HDMRalf_{subjectid}_{block}_{method}_{currenttime}_data.csv", n_trials)
+    atexit.register(trial_writer.close)
+    atexit.register(profiler.close, sidecar_path(trial_writer.csv_path))
+
+    def quit_experiment():
+        """Write the data file and shut down after an escape key press or window close."""
+        trial_writer.close()
+        print(display.summary())
+        pygame.quit()
+        sys.exit()
+
+    responses = ResponseCollector(quit_experiment)
+
+    # Render all feedback text and tutorial pages before the first screen
+    text_cache = TextCache()
+    text_cache.prewarm((feedback, FEEDBACK_FONT_SIZE, color) for feedback, color in FEEDBACK_COLORS.items())
+    if tutorial:
+        for screen in TUTORIAL_SCREENS:
+            text_cache.render(screen["title"], TUTORIAL_FONT_SIZE, BLACK)
+            text_cache.render_wrapped(screen["text"], TUTORIAL_FONT_SIZE, BLACK, TUTORIAL_WRAP_WIDTH)
+        text_cache.render("Next", TUTORIAL_FONT_SIZE, BLACK)
+
+    if tutorial:
+        show_tutorial_screens(win, text_cache, win_size, stimuli, icons, display, responses)
+
+
+    # Dot Cloud
+    n_dots = 1000
+    dot_radius = 4  # Radius of each dot in pixels
+    view_radius = min(win_size) // 5  # Radius of the circle in pixels
+    win_center_x, win_center_y = win_size[0] // 2, win_size[1] // 2
+    dot_cloud = DotCloud(view_radius, (win_center_x, win_center_y), dot_radius, backend=RENDER_BACKEND)
+
+    # Regions of the window that change during the dot and fixation phases
+    dot_rect = pygame.Rect(0, 0, 2 * (view_radius + dot_radius) + 2, 2 * (view_radius + dot_radius) + 2)
+    dot_rect.center = (win_center_x, win_center_y)
+    fixation_rect = pygame.Rect(win_center_x - 5, win_center_y - 5, 10, 10)
+
+    # In adaptive sessions QUEST replaces the scheduled proportion differences, starting from
+    # the medium level
+    quest = Quest(exp_info['MediumDiff']) if adaptive else None
+
+    # Scale the images of every trial before the first trial
+    scene_paths, face_paths = stimuli.scene_paths, stimuli.face_paths
+    stimulus_store.prewarm([(scene_path, 0.5, True) for scene_path in scene_paths] +
+                           [(face_path, 0.5, False) for face_path in face_paths])
+    stimuli.loader.shutdown()  # Images the session does not use are decoded on demand
+
+    # Frames of the next trial are composed into these two surfaces during the ITI
+    stimulus_frame = make_frame(win_size)
+    choices_frame = make_frame(win_size)
+
+    def prepare_trial(trial_number):
+        """Build the dot arrays, the face+scene frame and the choice frame of a trial ahead of time."""
+        if quest is not None:
+            schedule.proportion_diff[trial_number] = quest.intensity()
+        yellow_proportion, red_proportion = dot_proportions(schedule.proportion_diff[trial_number], schedule.majority_red[trial_number])
+        n_yellow = int(yellow_proportion * n_dots)
+        n_red = n_dots - n_yellow
+        with profiler.phase('dot_generation'):
+            dot_cloud.prepare(n_red, n_yellow)
+
+        with profiler.phase('compose'):
+            scene_image = stimulus_store.get(scene_paths[trial_number], 0.5, grayscale=True)
+            face_image = stimulus_store.get(face_paths[trial_number], 0.5)
+            stimulus_rects = compose_scene_with_face(stimulus_frame, scene_image, face_image, bool(schedule.face_on_top[trial_number]), GREY, WHITE)
+            choice_rects = compose_choices(choices_frame, icons, [CHOICES[i] for i in schedule.choice_layout[trial_number]], GREY, WHITE)
+        return yellow_proportion, red_proportion, n_red, n_yellow, stimulus_rects + [fixation_rect], choice_rects + [fixation_rect]
+
+    # Data collection list
+    phase_log = timing.PhaseLog()
+    # Rolling statistics for a console running python -m hdmtask.monitor
+    monitor = PerformanceMonitor()
+    monitor_publisher = MonitorPublisher()
+    score = 0
+    iti_trial_number = 0
+
+    next_trial = prepare_trial(0)
+
+    startup.mark('first_trial')
+    profiler.startup = {
+        'dialog_s': startup.since('dialog'),
+        'display_s': startup.since('display', 'dialog_closed'),
+        'first_trial_s': startup.since('first_trial', 'dialog_closed'),
+    }
+    print(f"Dialog shown {profiler.startup['dialog_s']:.2f} s after launch, first trial "
+          f"{profiler.startup['first_trial_s']:.2f} s after it closed")
+
+    # Main trial loop
+    for trial_number in range(n_trials):
+        responsewaitphase = 0
+        phase_log.clear()
+
+        if method == "fMRI" and trial_number == 0:
+            timing.precise_sleep(6)
+
+        # Check for escape key press
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                quit_experiment()
+
+        # Dot colors based on trial difficulty were prepared with the trial's frames
+        current_context = int(schedule.context[trial_number])
+        yellow_proportion, red_proportion, n_red, n_yellow, stimulus_rects, choice_rects = next_trial
+
+        win_center_x, win_center_y = win_size[0] // 2, win_size[1] // 2
+        dot_cloud.start(timing.now())
+
+        def draw_dot_frame():
+            # Replace expired dots and draw the dot cloud
+            with profiler.phase('dot_update'):
+                dot_cloud.update(timing.now())
+            with profiler.phase('dot_draw'):
+                win.fill(GREY)
+                dot_cloud.render(win)
+                pygame.draw.rect(win, WHITE, (win_center_x - 5, win_center_y - 5, 10, 10))  # Draw fixation square
+
+        # Present dots for stimulipres seconds, counted in display frames
+        frame_scheduler.present(stimulipres, draw_dot_frame, [dot_rect], 'dots')
+
+        # Inter-Trial Interval with fixation square
+        trial_isi = float(schedule.isi[trial_number])
+        win.fill(GREY)
+        pygame.draw.rect(win, WHITE, (win_size[0]//2 - 5, win_size[1]//2 - 5, 10, 10))  # Draw fixation square
+        # The offset flip goes through the scheduler so the last dot frame lasts a full frame
+        isi_onset = frame_scheduler.end([fixation_rect], 'isi')
+        phase_log.record('dots', stimulipres, isi_onset - frame_scheduler.flip_times[0])
+        with profiler.phase('isi'):
+            phase_log.wait('isi', trial_isi, isi_onset)
+
+        scene_type = SCENE_TYPES[schedule.scene_type[trial_number]]
+        face_type = FACE_TYPES[schedule.face_type[trial_number]]
+
+        # Display the pre-composed scene with the face
+        win.blit(stimulus_frame, (0, 0))
+        display.show(stimulus_rects, 'images')
+        phase_log.wait('images', 1.5)
+
+        pygame.event.clear()
+
+        # Display the pre-composed choices
+        shuffled_choices = [CHOICES[i] for i in schedule.choice_layout[trial_number]]
+        directions = DIRECTIONS
+        win.blit(choices_frame, (0, 0))
+        display.show(choice_rects, 'choices')
+        choices_onset = timing.now()
+
+        # Wait for the participant to make a choice within the response window
+        no_response = 0
+        with profiler.phase('response'):
+            key, response_time = responses.wait_for_key(ARROW_KEYS, responsewindow, choices_onset)
+        phase_log.record('response', responsewindow, timing.now() - choices_onset)
+        if key is not None:
+            direction_chosen = get_choice_from_key(key, directions)
+            chosen_option = shuffled_choices[directions.index(direction_chosen)]
+        else:
+            chosen_option = 'No Response'
+            no_response = 1
+
+        # chosen_color, color_response_time, color_no_response = display_color_choices(win, win_size)
+
+        # Determine correct response
+        correct = is_correct(current_context, n_red > n_yellow, chosen_option, face_type, scene_type)
+
+        # Feedback
+        feedback = FEEDBACK[outcome(correct, no_response)]
+        feedback_surface = text_cache.render(feedback, FEEDBACK_FONT_SIZE, FEEDBACK_COLORS[feedback])
+        win.fill(GREY)
+        feedback_rect = win.blit(feedback_surface, (win_size[0]//2 - feedback_surface.get_width()//2, win_size[1]//2 - feedback_surface.get_height()//2))
+        if correct:
+            score += 1
+        display.show([feedback_rect], 'feedback')
+        with profiler.phase('feedback'):
+            phase_log.wait('feedback', 0.5)
+
+        color_onset = timing.now()
+        with profiler.phase('color'):
+            chosen_color, color_response_time, color_no_response = display_color_choices(win, win_size, display, responses)
+        phase_log.record('color', 3, timing.now() - color_onset)
+        if quest is not None and not color_no_response:
+            quest.update(abs(n_red - n_yellow) / n_dots, chosen_color == ('red' if n_red > n_yellow else 'yellow'))
+
+        # The next trial's frames and dots are built while the ITI fixation is on screen
+        if self_guided == False:
+            trial_iti = float(schedule.iti[trial_number])
+            win.fill(GREY)
+            pygame.draw.rect(win, WHITE, (win_size[0]//2 - 5, win_size[1]//2 - 5, 10, 10))  # Draw fixation square
+            display.show([fixation_rect], 'iti')
+            iti_onset = timing.now()
+            if trial_number + 1 < n_trials:
+                next_trial = prepare_trial(trial_number + 1)
+            with profiler.phase('iti'):
+                phase_log.wait('iti', trial_iti, iti_onset)
+        elif self_guided == True:
+            win.fill(GREY)
+            pygame.draw.rect(win, WHITE, (win_size[0]//2 - 5, win_size[1]//2 - 5, 10, 10))  # Draw fixation square
+            display.show([fixation_rect], 'iti')
+            if trial_number + 1 < n_trials:
+                next_trial = prepare_trial(trial_number + 1)
+
+            if method == "BEH":
+                # Any key starts the next trial, with a max limit of 30 seconds
+                iti_onset = timing.now()
+                with profiler.phase('iti'):
+                    responses.wait_for_key(timeout=30, start_time=iti_onset)
+                phase_log.record('iti', 30, timing.now() - iti_onset)
+
+        # Store trial data
+        trial_data = trial_record(schedule, trial_number, n_red, n_yellow, chosen_option, response_time, chosen_color, correct, no_response, score, adaptive)
+        trial_data['render_backend'] = RENDER_BACKEND
+        trial_data.update(dot_cloud.frame_cost())
+        trial_data.update(frame_scheduler.frame_stats())
+        trial_data.update(phase_log.trial_data())
+        if quest is not None:
+            trial_data.update(quest.trial_data())
+
+        trial_writer.write(trial_data)
+        monitor.record(correct, response_time, no_response, current_context)
+        monitor_publisher.publish(monitor.snapshot())
+        if trial_number in (0, n_trials - 1):
+            profiler.snapshot(f'after trial {trial_number}')
+
+        if method == "fMRI" and trial_number == (n_trials - 1):
+            timing.precise_sleep(10)
+        if block == "practice" and trial_number == (n_trials - 1):
+            accuracy = score / n_trials
+            message = f'The overall accuracy is {accuracy*100:.2f}%\n'
+            if accuracy < 0.7:
+                message += 'You may want to practice again.'
+            else:
+                message += 'Press Escape to quit'
+            win.fill(GREY)
+            text_surface = text_cache.render(message, 36, BLACK)
+            win.blit(text_surface, (win_size[0]//2 - text_surface.get_width()//2, win_size[1]//2 - text_surface.get_height()//2))
+            display.show(phase='message')
+            timing.precise_sleep(5)
+
+        iti_trial_number += 1
+
+    # Save trial data to CSV
+    trial_writer.close()
+    profiler.close(sidecar_path(trial_writer.csv_path))
+
+    monitor_publisher.close()
+    print(display.summary())
+    pygame.quit()
+    if quest is not None:
+        print(f"Estimated proportion difference threshold {quest.threshold():.3f} (log10 SD {quest.sd():.2f}) "
+              f"from {quest.n_updates} color reports")
+    print("Experiment finished.")
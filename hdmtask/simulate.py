@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Headless sessions answered by a synthetic participant on a virtual clock.
+
+Runs the trial schedule, scoring and data file code of the task without a display, a Tk
+dialog or any waiting, so thousands of sessions can be checked in a batch job:
+
+    python -m hdmtask.simulate --sessions 1000 --jobs 8 --out simulated
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from hdmtask.adaptive import Quest
+from hdmtask.datalog import TrialWriter
+from hdmtask.schedule import DEFAULT_EXP_INFO, FACE_TYPES, SCENE_TYPES, TrialSchedule, dot_proportions
+from hdmtask.scoring import FEATURE_CHOICES, attended_feature, is_correct, outcome, trial_record
+from hdmtask.timing import PhaseLog
+
+N_TRIALS = 80
+N_DOTS = 1000
+N_IMAGES = {'rural': 1, 'urban': 1, 'male': 1, 'female': 1}
+IMAGES_DURATION = 1.5
+FEEDBACK_DURATION = 0.5
+COLOR_WINDOW = 3
+SELF_GUIDED_ITI_WINDOW = 30
+
+
+class VirtualClock:
+    """Clock that only moves when a phase is spent on it, so simulated sessions never wait."""
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, duration):
+        self.time += duration
+        return duration
+
+
+class SyntheticAgent:
+    """Participant model answering the choice and color prompts.
+
+    The majority color is seen correctly with a Weibull psychometric function of the
+    proportion difference, the attended image is named correctly with image_accuracy and
+    response times are lognormal around rt_median. The agent holds a belief about the
+    color-task mapping and switches it with switch_probability after an incorrect trial,
+    which is how it learns the covert context switches.
+    """
+
+    def __init__(self, color_threshold=0.1, image_accuracy=0.95, rt_median=0.8, rt_sigma=0.35,
+                 lapse_rate=0.02, switch_probability=0.5, rng=None):
+        self.color_threshold = color_threshold
+        self.image_accuracy = image_accuracy
+        self.rt_median = rt_median
+        self.rt_sigma = rt_sigma
+        self.lapse_rate = lapse_rate
+        self.switch_probability = switch_probability
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.reset()
+
+    def reset(self):
+        """Forget the mapping learned in a previous session."""
+        self.belief = int(self.rng.integers(1, 3))
+        self.seen_red = None
+
+    def response_time(self):
+        return float(self.rng.lognormal(math.log(self.rt_median), self.rt_sigma))
+
+    def see_dots(self, proportion_diff, majority_red):
+        """Judge the majority color of a dot cloud."""
+        p_seen = 1 - 0.5 * math.exp(-(proportion_diff / self.color_threshold) ** 2)
+        self.seen_red = bool(majority_red) == (self.rng.random() < p_seen)
+
+    def choose(self, face_type, scene_type, timeout):
+        """Name the attended image. Returns (choice, rt), or (None, timeout) for a miss."""
+        rt = self.response_time()
+        if rt > timeout or self.rng.random() < self.lapse_rate:
+            return None, timeout
+        feature = attended_feature(self.belief, self.seen_red)
+        target = face_type if feature == 'face' else scene_type
+        if self.rng.random() < self.image_accuracy:
+            return target, rt
+        return next(option for option in FEATURE_CHOICES[feature] if option != target), rt
+
+    def choose_color(self, timeout):
+        """Report the majority color. Returns (color, rt), or (None, timeout) for a miss."""
+        rt = self.response_time()
+        if rt > timeout:
+            return None, timeout
+        return ('red' if self.seen_red else 'yellow'), rt
+
+    def feedback(self, correct, no_response):
+        if not correct and not no_response and self.rng.random() < self.switch_probability:
+            self.belief = 3 - self.belief
+
+    def next_trial_delay(self):
+        """Time taken to press a key in self-guided ITIs."""
+        return self.response_time()
+
+
+def simulate_session(exp_info=None, agent=None, n_trials=N_TRIALS, seed=None, n_images=None,
+                     isi_durations=None, iti_durations=None, csv_path=None):
+    """Run one session and return (schedule, rows). The rows are also written to csv_path if given."""
+    exp_info = {**DEFAULT_EXP_INFO, 'Subject': 'sim', **(exp_info or {})}
+    schedule = TrialSchedule.build(exp_info, n_trials, n_images or N_IMAGES, isi_durations, iti_durations, seed)
+    agent = agent if agent is not None else SyntheticAgent(rng=np.random.default_rng(schedule.seed))
+    agent.reset()
+    clock = VirtualClock()
+    phase_log = PhaseLog()
+    writer = TrialWriter(csv_path, n_trials) if csv_path is not None else None
+    quest = Quest(exp_info['MediumDiff']) if exp_info['Adaptive'] else None
+
+    rows = []
+    score = 0
+    if exp_info['Method'] == 'fMRI':
+        clock.advance(6)
+    for trial_number in range(n_trials):
+        phase_log.clear()
+        trial_onset = clock.now()
+        if quest is not None:
+            schedule.proportion_diff[trial_number] = quest.intensity()
+        yellow_proportion, _ = dot_proportions(schedule.proportion_diff[trial_number], schedule.majority_red[trial_number])
+        n_yellow = int(yellow_proportion * N_DOTS)
+        n_red = N_DOTS - n_yellow
+        face_type = FACE_TYPES[schedule.face_type[trial_number]]
+        scene_type = SCENE_TYPES[schedule.scene_type[trial_number]]
+
+        agent.see_dots(schedule.proportion_diff[trial_number], n_red > n_yellow)
+        for name, duration in (('dots', exp_info['StimuliPres']), ('isi', float(schedule.isi[trial_number])), ('images', IMAGES_DURATION)):
+            phase_log.record(name, duration, clock.advance(duration))
+
+        choice, response_time = agent.choose(face_type, scene_type, exp_info['ResponseWindow'])
+        no_response = int(choice is None)
+        chosen_option = 'No Response' if no_response else choice
+        phase_log.record('response', exp_info['ResponseWindow'], clock.advance(response_time))
+
+        correct = is_correct(int(schedule.context[trial_number]), n_red > n_yellow, chosen_option, face_type, scene_type)
+        score += correct
+        agent.feedback(correct, no_response)
+        phase_log.record('feedback', FEEDBACK_DURATION, clock.advance(FEEDBACK_DURATION))
+
+        chosen_color, color_time = agent.choose_color(COLOR_WINDOW)
+        phase_log.record('color', COLOR_WINDOW, clock.advance(color_time))
+        if quest is not None and chosen_color is not None:
+            quest.update(abs(n_red - n_yellow) / N_DOTS, chosen_color == ('red' if n_red > n_yellow else 'yellow'))
+
+        if not exp_info['SelfGuided']:
+            trial_iti = float(schedule.iti[trial_number])
+            phase_log.record('iti', trial_iti, clock.advance(trial_iti))
+        elif exp_info['Method'] == 'BEH':
+            phase_log.record('iti', SELF_GUIDED_ITI_WINDOW, clock.advance(min(agent.next_trial_delay(), SELF_GUIDED_ITI_WINDOW)))
+
+        trial_data = trial_record(schedule, trial_number, n_red, n_yellow, chosen_option, response_time,
+                                  chosen_color or 'No Response', correct, no_response, score, quest is not None)
+        trial_data['trial_onset'] = trial_onset
+        trial_data.update(phase_log.trial_data())
+        if quest is not None:
+            trial_data.update(quest.trial_data())
+        rows.append(trial_data)
+        if writer is not None:
+            writer.write(trial_data)
+
+    if writer is not None:
+        writer.close()
+    return schedule, rows
+
+
+def check_session(schedule, rows):
+    """Return a list of problems found in the rows of a simulated session."""
+    problems = []
+    score = 0
+    for trial_number, row in enumerate(rows):
+        score += row['correct_binary']
+        if row['correct'] != outcome(row['correct_binary'], row['chosen_image'] == 'No Response'):
+            problems.append(f"trial {trial_number}: 'correct' is {row['correct']!r}")
+        if not math.isclose(row['running_score'], score / (trial_number + 1)):
+            problems.append(f"trial {trial_number}: running score {row['running_score']}")
+        if row['majority_color'] != ('red' if schedule.majority_red[trial_number] else 'yellow'):
+            problems.append(f"trial {trial_number}: majority color {row['majority_color']}")
+    if len(rows) != len(schedule):
+        problems.append(f"{len(rows)} rows for {len(schedule)} trials")
+    return problems
+
+
+def _run_one(task):
+    """Worker of simulate_sessions(); returns a small summary of one session."""
+    session, exp_info, agent_params, seed, timings, out_dir = task
+    agent = SyntheticAgent(rng=np.random.default_rng(seed), **agent_params)
+    csv_path = None
+    if out_dir is not None:
+        csv_path = os.path.join(out_dir, f"HDMRalf_{exp_info['Subject']}{session:05d}_{exp_info['Block']}_{exp_info['Method']}_sim_data.csv")
+    schedule, rows = simulate_session(exp_info, agent, seed=seed, isi_durations=timings[0], iti_durations=timings[1], csv_path=csv_path)
+    return {
+        'session': session,
+        'seed': schedule.seed,
+        'accuracy': rows[-1]['running_score'],
+        'misses': sum(row['correct'] == 'no response' for row in rows),
+        'threshold': rows[-1].get('quest_threshold', math.nan),
+        'problems': check_session(schedule, rows),
+    }
+
+
+def simulate_sessions(n_sessions, exp_info=None, agent_params=None, seed=None, jobs=None, out_dir=None,
+                      isi_durations=None, iti_durations=None):
+    """Run n_sessions sessions over jobs worker processes and return their summaries in order."""
+    exp_info = {**DEFAULT_EXP_INFO, 'Subject': 'sim', **(exp_info or {})}
+    seeds = np.random.SeedSequence(seed).generate_state(n_sessions)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    timings = (isi_durations, iti_durations)
+    tasks = [(session, exp_info, agent_params or {}, int(seeds[session]), timings, out_dir) for session in range(n_sessions)]
+    if jobs == 1:
+        return [_run_one(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_run_one, tasks, chunksize=max(1, n_sessions // (4 * (jobs or os.cpu_count() or 1)))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the whole batch')
+    parser.add_argument('--out', default=None, help='directory for the data files (default: none written)')
+    parser.add_argument('--method', choices=('BEH', 'fMRI'), default='BEH')
+    parser.add_argument('--block', default='0')
+    parser.add_argument('--timing-file', default=None, help='ISI/ITI file of fMRI sessions, as in QuantumITI_afni')
+    parser.add_argument('--self-guided', action='store_true')
+    parser.add_argument('--adaptive', action='store_true', help='set proportion differences with QUEST')
+    parser.add_argument('--color-threshold', type=float, default=0.1)
+    parser.add_argument('--image-accuracy', type=float, default=0.95)
+    parser.add_argument('--rt-median', type=float, default=0.8)
+    parser.add_argument('--rt-sigma', type=float, default=0.35)
+    parser.add_argument('--switch-probability', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    exp_info = {'Method': args.method, 'Block': args.block, 'SelfGuided': args.self_guided, 'Adaptive': args.adaptive}
+    isi_durations = iti_durations = None
+    if args.method == 'fMRI':
+        if args.timing_file is None:
+            parser.error('fMRI sessions need --timing-file')
+        # Alternating ISI and ITI lines, like the files the task reads
+        timings = np.loadtxt(args.timing_file, ndmin=1)
+        isi_durations, iti_durations = list(timings[0::2]), list(timings[1::2])
+    agent_params = {
+        'color_threshold': args.color_threshold,
+        'image_accuracy': args.image_accuracy,
+        'rt_median': args.rt_median,
+        'rt_sigma': args.rt_sigma,
+        'switch_probability': args.switch_probability,
+    }
+    start = time.perf_counter()
+    summaries = simulate_sessions(args.sessions, exp_info, agent_params, args.seed, args.jobs, args.out,
+                                  isi_durations, iti_durations)
+    elapsed = time.perf_counter() - start
+
+    accuracy = np.array([summary['accuracy'] for summary in summaries])
+    problems = [(summary['session'], problem) for summary in summaries for problem in summary['problems']]
+    print(f"{len(summaries)} sessions in {elapsed:.1f} s ({60 * len(summaries) / elapsed:,.0f} sessions/min)")
+    print(f"Accuracy mean {accuracy.mean():.3f}, range {accuracy.min():.3f}-{accuracy.max():.3f}")
+    if args.adaptive:
+        thresholds = np.array([summary['threshold'] for summary in summaries])
+        print(f"QUEST threshold mean {thresholds.mean():.3f}, range {thresholds.min():.3f}-{thresholds.max():.3f}")
+    for session, problem in problems[:20]:
+        print(f"  session {session}: {problem}")
+    if problems:
+        print(f"{len(problems)} problems found")
+        return 1
+    print("No problems found")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
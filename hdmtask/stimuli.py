@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Lazily decoded, pre-scaled image stimuli."""
+
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+
+IMAGE_EXTENSIONS = ('.png', '.jpg')
+
+# Grayscale scenes are cached next to the stimuli, in a folder per stimulus folder
+GRAYSCALE_CACHE_DIR = '.grayscale_cache'
+GRAY_PALETTE = [(level, level, level) for level in range(256)]
+
+
+def list_images(folder_path):
+    """List the image files in a folder without decoding them."""
+    return [os.path.join(folder_path, filename) for filename in sorted(os.listdir(folder_path))
+            if filename.endswith(IMAGE_EXTENSIONS)]
+
+
+def grayscale_levels(image):
+    """Return the gray levels of a Pygame surface as a (width, height) uint8 array."""
+    arr = pygame.surfarray.pixels3d(image)
+    # 0.299, 0.587 and 0.114 luma weights in 1/256ths, summed in uint16 so there is no float copy
+    gray = np.multiply(arr[..., 0], 77, dtype=np.uint16)
+    channel = np.empty_like(gray)
+    gray += np.multiply(arr[..., 1], 150, out=channel, dtype=np.uint16)
+    gray += np.multiply(arr[..., 2], 29, out=channel, dtype=np.uint16)
+    gray >>= 8
+    return gray.astype(np.uint8)
+
+
+def convert_to_grayscale(image):
+    """Convert a Pygame surface to grayscale in place."""
+    gray = grayscale_levels(image)
+    arr = pygame.surfarray.pixels3d(image)
+    arr[...] = gray[..., None]
+    del arr  # Unlock the surface
+    return image
+
+
+def gray_surface(gray):
+    """Make an 8-bit surface with a gray palette from a (width, height) array of gray levels."""
+    surface = pygame.surfarray.make_surface(gray)
+    surface.set_palette(GRAY_PALETTE)
+    return surface
+
+
+def load_grayscale_levels(path):
+    """Load the gray levels of an image, using the on-disk cache keyed by the file's content hash."""
+    with open(path, 'rb') as image_file:
+        data = image_file.read()
+    cache_folder = os.path.join(os.path.dirname(path), GRAYSCALE_CACHE_DIR)
+    cache_path = os.path.join(cache_folder, hashlib.sha1(data).hexdigest() + '.npy')
+
+    if os.path.exists(cache_path):
+        return np.load(cache_path, mmap_mode='r')
+
+    gray = grayscale_levels(pygame.image.load(io.BytesIO(data), path))
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves a truncated entry
+        temp_path = cache_path + '.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            np.save(cache_file, gray)
+        os.replace(temp_path, cache_path)
+    except OSError as error:
+        print(f"Could not cache grayscale image for {path}: {error}")
+    return gray
+
+
+def decode_image(path, grayscale=False):
+    """Decode an image into a raw (format, size, pixels) buffer.
+
+    Safe to call from worker threads; surface_from_raw() turns the buffer into a Surface.
+    """
+    if grayscale:
+        gray = np.ascontiguousarray(load_grayscale_levels(path))
+        return 'gray', gray.shape, gray
+    image = pygame.image.load(path)
+    raw_format = 'RGBA' if image.get_flags() & pygame.SRCALPHA else 'RGB'
+    return raw_format, image.get_size(), pygame.image.tobytes(image, raw_format)
+
+
+def surface_from_raw(raw):
+    """Build a Surface from a buffer returned by decode_image()."""
+    raw_format, size, pixels = raw
+    if raw_format == 'gray':
+        return gray_surface(pixels)
+    return pygame.image.frombytes(pixels, size, raw_format)
+
+
+class StimulusLoader:
+    """Decodes stimuli on a thread pool, e.g. while the experiment info dialog is open."""
+
+    def __init__(self, max_workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='StimulusLoader')
+        self.pending = {}
+
+    def submit(self, paths, grayscale=False):
+        """Start decoding paths in the background."""
+        for path in paths:
+            if (path, grayscale) not in self.pending:
+                self.pending[(path, grayscale)] = self.executor.submit(decode_image, path, grayscale)
+
+    def take(self, path, grayscale=False):
+        """Return the decoded buffer for path, waiting for it if needed, or None if it was never submitted."""
+        future = self.pending.pop((path, grayscale), None)
+        return None if future is None else future.result()
+
+    def shutdown(self):
+        """Stop decoding and drop the buffers that were not used."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+
+
+class StimulusStore:
+    """LRU cache of decoded, scaled and display-converted stimulus surfaces.
+
+    Surfaces are keyed by (path, scale, grayscale) and decoded on first use, unless a
+    StimulusLoader has already decoded them in the background.
+    """
+
+    def __init__(self, max_items=256, loader=None):
+        self.max_items = max_items
+        self.loader = loader
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, scale=1.0, grayscale=False):
+        """Return the surface for path scaled by scale, loading it if it is not cached."""
+        key = (path, scale, grayscale)
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.load(path, scale, grayscale)
+        self.cache[key] = surface
+        if len(self.cache) > self.max_items:
+            self.cache.popitem(last=False)
+        return surface
+
+    def load(self, path, scale, grayscale):
+        """Decode, convert and scale one image, taking it from the background loader if possible."""
+        raw = self.loader.take(path, grayscale) if self.loader is not None else None
+        if raw is None:
+            raw = decode_image(path, grayscale)
+        image = surface_from_raw(raw)
+        if scale != 1.0:
+            image = pygame.transform.scale(image, (int(image.get_width() * scale), int(image.get_height() * scale)))
+        # Match the display pixel format so blits do not convert on every frame
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+        return image
+
+    def prewarm(self, keys):
+        """Load every (path, scale, grayscale) key ahead of time, e.g. all images of a session."""
+        keys = list(dict.fromkeys(keys))
+        self.max_items = max(self.max_items, len(keys))
+        for key in keys:
+            self.get(*key)
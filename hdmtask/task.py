@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Entry point of the task: shows the experiment info dialog as soon as Python starts.
+
+Only the standard library and the Tk dialog are imported up front. pygame, NumPy, pandas,
+the stimulus folder listing and the icon decoding start on a background thread while the
+dialog is open, so they are ready, or nearly so, by the time it is closed. The session's
+scenes and faces are decoded once its schedule is known.
+"""
+
+import os
+import sys
+import threading
+
+from hdmtask.timing import StartupTimer
+
+
+def _prepare(prepared, root, cancelled):
+    """Import the session module, index the stimuli of the task folder and start decoding the icons."""
+    try:
+        from hdmtask import session
+        prepared['session'] = session
+        prepared['stimuli'] = session.Stimuli(root)
+        if cancelled.is_set():
+            prepared['stimuli'].loader.shutdown()
+    except BaseException as error:  # Re-raised on the main thread once the dialog closes
+        prepared['error'] = error
+
+
+def main(start_time=None):
+    """Run the task. start_time is the timing.now() time of the launch, if taken earlier."""
+    startup = StartupTimer(start_time)
+    prepared = {}
+    cancelled = threading.Event()
+    preparation = threading.Thread(target=_prepare, args=(prepared, os.getcwd(), cancelled), name='SessionImport', daemon=True)
+    preparation.start()
+
+    from hdmtask.dialog import ExperimentInfoDialog, show_error
+    root = ExperimentInfoDialog()
+    root.after_idle(startup.mark, 'dialog')
+    root.mainloop()
+
+    exp_info = root.result
+    if not exp_info:
+        # Cancel the pending decodes so exiting only waits for the images being decoded now
+        cancelled.set()
+        if 'stimuli' in prepared:
+            prepared['stimuli'].loader.shutdown()
+        sys.exit()
+    startup.mark('dialog_closed')
+
+    preparation.join()
+    if 'error' in prepared:
+        raise prepared['error']
+    session, stimuli = prepared['session'], prepared['stimuli']
+    # The whole session is scheduled before pygame starts, so a bad schedule stops the task
+    # before the participant sees anything
+    try:
+        schedule = session.plan_session(exp_info, stimuli)
+    except (OSError, ValueError) as error:
+        # A missing or unusable timing file or bundle, shown to the experimenter rather than
+        # as a traceback in a console that may be hidden
+        stimuli.loader.shutdown()
+        print(error)
+        show_error("Cannot start the session", str(error))
+        sys.exit(1)
+    session.run(exp_info, stimuli, schedule, startup)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Cache of fonts and rendered text surfaces."""
+
+import textwrap
+
+import pygame
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (text, size, color), with one Font per size.
+
+    Building a Font and rendering text are slow in pygame, so both happen once and
+    ideally before the first trial through prewarm().
+    """
+
+    def __init__(self, font_name=None):
+        self.font_name = font_name
+        self.fonts = {}
+        self.surfaces = {}
+
+    def font(self, size):
+        """Return the Font for size, creating it on first use."""
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.font_name, size)
+        return font
+
+    def render(self, text, size, color):
+        """Return the antialiased surface for text, rendering it on first use."""
+        key = (text, size, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size).render(text, True, color)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+            self.surfaces[key] = surface
+        return surface
+
+    def render_wrapped(self, text, size, color, width):
+        """Return the surfaces of text wrapped to width characters, one per line."""
+        return [self.render(line, size, color) for line in textwrap.wrap(text, width=width)]
+
+    def line_height(self, size):
+        return self.font(size).get_height()
+
+    def prewarm(self, items):
+        """Render every (text, size, color) item ahead of time."""
+        for text, size, color in items:
+            self.render(text, size, color)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""High-resolution monotonic timing for reaction times and phase durations."""
+
+import time
+
+# Sleep coarsely until this long before a deadline, then spin for the rest
+SPIN_WINDOW = 0.002
+
+
+def now():
+    """Monotonic time in seconds, from time.perf_counter_ns()."""
+    return time.perf_counter_ns() / 1e9
+
+
+def sleep_until(deadline, spin=SPIN_WINDOW):
+    """Sleep until deadline (a now() time) and return the time it actually woke up.
+
+    time.sleep() and pygame.time.wait() tend to oversleep by a millisecond or more, so they
+    only cover the time up to the last spin seconds, which are spent busy-waiting.
+    """
+    remaining = deadline - now()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    current = now()
+    while current < deadline:
+        current = now()
+    return current
+
+
+def precise_sleep(duration, spin=SPIN_WINDOW):
+    """Sleep for duration seconds and return the achieved duration."""
+    start = now()
+    return sleep_until(start + duration, spin) - start
+
+
+class PhaseLog:
+    """Intended and achieved duration of every phase of a trial."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def record(self, name, intended, achieved):
+        self.phases[name] = (intended, achieved)
+
+    def wait(self, name, duration, start=None):
+        """Hold the current screen for duration seconds from start (default now) and record it."""
+        if start is None:
+            start = now()
+        self.record(name, duration, sleep_until(start + duration) - start)
+
+    def trial_data(self):
+        """Return the durations as '<phase>_intended' and '<phase>_achieved' trial data fields."""
+        fields = {}
+        for name, (intended, achieved) in self.phases.items():
+            fields[f'{name}_intended'] = intended
+            fields[f'{name}_achieved'] = achieved
+        return fields
+
+    def clear(self):
+        self.phases.clear()
+
+
+class StartupTimer:
+    """Times of the startup milestones of a session, e.g. the dialog showing and the first trial."""
+
+    def __init__(self, start=None):
+        self.start = now() if start is None else start
+        self.marks = {}
+
+    def mark(self, name):
+        self.marks[name] = now()
+
+    def since(self, name, since=None):
+        """Seconds from the milestone since (default the start) to the milestone name."""
+        return self.marks[name] - (self.start if since is None else self.marks[since])
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hdmtask import analysis
+from hdmtask.analysis import SESSION_CACHE, Sessions
+from hdmtask.records import TRIAL_DTYPE, TRIAL_FIELDS
+
+
+def write_session(folder, subject, n_trials=5):
+    path = os.path.join(folder, f"HDMRalf_{subject}_1_BEH_2026-01-01-10-00-00_data.csv")
+    pd.DataFrame({
+        'proportion_diff': np.full(n_trials, 0.12),
+        'correct': ['correct'] * n_trials,
+        'correct_binary': np.ones(n_trials, dtype=int),
+        'current_context': np.ones(n_trials, dtype=int),
+        'response_time': np.full(n_trials, 0.5),
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_unchanged_sessions_are_read_from_the_cache(tmp_path, monkeypatch):
+    write_session(tmp_path, '101')
+    Sessions.load(str(tmp_path), jobs=1)
+    monkeypatch.setattr(analysis, 'read_session', lambda path: pytest.fail(f"{path} parsed again"))
+    sessions = Sessions.load(str(tmp_path), jobs=1)
+    assert len(sessions.trials) == 5 and sessions.trials.dtype == TRIAL_DTYPE
+
+
+def test_cache_of_another_schema_is_discarded(tmp_path):
+    write_session(tmp_path, '101')
+    Sessions.load(str(tmp_path), jobs=1)
+    # Rewrite the cache as an older version would have, with fewer fields and no schema
+    old_dtype = np.dtype([field for field in TRIAL_FIELDS if not field[0].startswith('quest_')])
+    with np.load(tmp_path / SESSION_CACHE) as cache:
+        arrays = {name: cache[name] for name in ('names', 'mtimes', 'offsets')}
+        arrays['trials'] = np.zeros(len(cache['trials']), dtype=old_dtype)
+    np.savez(tmp_path / SESSION_CACHE, **arrays)
+
+    assert Sessions.load(str(tmp_path), jobs=1).trials.dtype == TRIAL_DTYPE
+    np.savez(tmp_path / SESSION_CACHE, **arrays)
+    write_session(tmp_path, '102')
+    sessions = Sessions.load(str(tmp_path), jobs=1)
+    assert sessions.trials.dtype == TRIAL_DTYPE and len(sessions.trials) == 10
+    assert (sessions.trials['proportion_diff'] == 0.12).all()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+from hdmtask.display import DisplayUpdater  # noqa: E402
+from hdmtask.frames import open_display  # noqa: E402
+
+WINDOW_SIZE = (200, 100)
+
+
+@pytest.fixture(autouse=True)
+def pygame_session():
+    pygame.init()
+    yield
+    pygame.quit()
+
+
+def test_partial_updates_count_current_and_previous_regions():
+    display = DisplayUpdater(pygame.display.set_mode(WINDOW_SIZE))
+    assert display.show(phase='first') == 200 * 100
+    assert display.show([pygame.Rect(0, 0, 10, 10)], 'fixation') == 200 * 100 + 10 * 10
+    assert display.show([pygame.Rect(50, 50, 20, 5)], 'feedback') == 10 * 10 + 20 * 5
+
+
+def test_open_display_reports_the_renderer_the_window_flags_hide():
+    window, vsync, renderer = open_display(WINDOW_SIZE)
+    # Only the SCALED set_mode() call gets vsync, and the window's surface flags never show SCALED
+    assert renderer == vsync
+    assert not window.get_flags() & pygame.SCALED
+
+
+def test_renderer_display_counts_full_flips():
+    display = DisplayUpdater(pygame.display.set_mode(WINDOW_SIZE), renderer=True)
+    assert not display.partial
+    assert display.show([pygame.Rect(0, 0, 10, 10)], 'fixation') == 200 * 100
+    assert 'full flips' in display.summary()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Steady-state dot cloud frames allocate (almost) nothing, measured with tracemalloc."""
+
+import itertools
+import os
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+from hdmtask.dotcloud import DotCloud  # noqa: E402
+from hdmtask.render import BACKENDS, DEFAULT_BACKEND  # noqa: E402
+
+WINDOW_SIZE = (1920, 1080)
+N_DOTS = 1000
+WARMUP_FRAMES = 30
+N_FRAMES = 100
+# Peak bytes per frame; what is left are small Python objects such as array views and floats
+FRAME_LIMIT = 2048
+GREY = (128, 128, 128)
+
+
+@pytest.fixture
+def window():
+    pygame.init()
+    yield pygame.display.set_mode(WINDOW_SIZE)
+    pygame.quit()
+
+
+def warm_cloud(window, backend):
+    """A cloud of N_DOTS dots and its frame clock, after WARMUP_FRAMES frames."""
+    view_radius = min(WINDOW_SIZE) // 5
+    cloud = DotCloud(view_radius, (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2), rng=np.random.default_rng(0), backend=backend)
+    cloud.reset(N_DOTS // 2, N_DOTS - N_DOTS // 2, 0.0)
+    clock = itertools.count(0.0, 1 / 60)
+    for _ in range(WARMUP_FRAMES):
+        cloud.update(next(clock))
+        cloud.render(window)
+    return cloud, clock
+
+
+def max_frame_allocation(function, n_frames=N_FRAMES):
+    """Largest peak of bytes allocated by one of n_frames calls of function."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(n_frames):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+    return max(peaks)
+
+
+@pytest.mark.parametrize('backend', list(BACKENDS))
+def test_update_allocates_under_frame_limit(window, backend):
+    cloud, clock = warm_cloud(window, backend)
+    assert max_frame_allocation(lambda: cloud.update(next(clock))) <= FRAME_LIMIT
+
+
+def test_task_backend_render_allocates_under_frame_limit(window):
+    # The sprite and circle backends hand pygame one Python object per dot every frame, so
+    # only the task's backend is held to the limit
+    cloud, _ = warm_cloud(window, DEFAULT_BACKEND)
+    window.fill(GREY)
+    assert max_frame_allocation(lambda: cloud.render(window)) <= FRAME_LIMIT
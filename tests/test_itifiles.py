@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from hdmtask.itifiles import TimingIndex
+from hdmtask.schedule import DEFAULT_EXP_INFO
+
+ISI_RANGE = (0.1, 0.5)
+ITI_RANGE = (3.0, 6.0)
+
+
+def write_timing_file(folder, name, isi, iti, n_trials):
+    with open(os.path.join(folder, name), 'w') as timing_file:
+        timing_file.writelines(f"{isi}\n{iti}\n" for _ in range(n_trials))
+
+
+def test_pick_lists_the_problem_of_every_file(tmp_path):
+    write_timing_file(tmp_path, 'short.1D', 0.2, 4.0, 60)
+    write_timing_file(tmp_path, 'slow.1D', 0.2, 9.0, 80)
+    index = TimingIndex.load(str(tmp_path))
+    with pytest.raises(ValueError) as error:
+        index.pick('101', '1', 80, ISI_RANGE, ITI_RANGE)
+    assert 'short.1D: 60 ISI/ITI pairs for 80 trials' in str(error.value)
+    assert 'slow.1D: ITIs 9.00-9.00 outside 3.0-6.0' in str(error.value)
+
+
+def test_pick_is_stable_and_skips_unusable_files(tmp_path):
+    write_timing_file(tmp_path, 'a.1D', 0.2, 4.0, 80)
+    write_timing_file(tmp_path, 'b.1D', 0.3, 5.0, 80)
+    write_timing_file(tmp_path, 'short.1D', 0.2, 4.0, 10)
+    index = TimingIndex.load(str(tmp_path))
+    name, isi, iti = index.pick('101', '1', 80, ISI_RANGE, ITI_RANGE)
+    assert name in ('a.1D', 'b.1D') and len(isi) == len(iti) == 80
+    assert TimingIndex.load(str(tmp_path)).pick('101', '1', 80, ISI_RANGE, ITI_RANGE)[0] == name
+
+
+def test_fmri_session_without_usable_timing_file_fails_before_pygame_starts(tmp_path, monkeypatch):
+    import pygame
+
+    from hdmtask.session import plan_session
+
+    os.mkdir(tmp_path / 'QuantumITI_afni')
+    write_timing_file(tmp_path / 'QuantumITI_afni', 'short.1D', 0.2, 4.0, 60)
+    stimuli = SimpleNamespace(rural_scenes=['rural.png'], urban_scenes=['urban.png'], male_faces=['male.png'], female_faces=['female.png'])
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match='short.1D'):
+        plan_session({**DEFAULT_EXP_INFO, 'Subject': '101', 'Method': 'fMRI'}, stimuli)
+    assert not pygame.get_init()
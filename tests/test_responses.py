@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+from hdmtask.responses import ResponseCollector  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.init()
+    pygame.display.set_mode((64, 64))
+    pygame.event.clear()
+    yield
+    pygame.quit()
+
+
+class FakeClock:
+    """Clock returning the next of a list of times on each call."""
+
+    def __init__(self, *times):
+        self.times = list(times)
+
+    def __call__(self):
+        return self.times.pop(0)
+
+
+def post_key(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+
+def test_response_time_is_clock_reading_when_wait_returns():
+    post_key(pygame.K_LEFT)
+    collector = ResponseCollector(on_quit=None, clock=FakeClock(10.0, 10.25))
+    assert collector.wait_for_key([pygame.K_LEFT], timeout=5, start_time=10.0) == (pygame.K_LEFT, 0.25)
+
+
+def test_other_keys_are_ignored_until_timeout():
+    post_key(pygame.K_a)
+    collector = ResponseCollector(on_quit=None)
+    assert collector.wait_for_key([pygame.K_LEFT], timeout=0.05) == (None, 0.05)
+
+
+def test_escape_calls_on_quit():
+    quits = []
+    post_key(pygame.K_ESCAPE)
+    post_key(pygame.K_RIGHT)
+    collector = ResponseCollector(on_quit=lambda: quits.append(True))
+    key, _ = collector.wait_for_key([pygame.K_RIGHT], timeout=1)
+    assert quits == [True] and key == pygame.K_RIGHT
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from hdmtask.schedule import DEFAULT_EXP_INFO, TrialSchedule, validate_schedule
+
+N_IMAGES = {'rural': 5, 'urban': 6, 'male': 7, 'female': 8}
+# Stimuli attribute of each kind of image
+IMAGE_FOLDERS = {'rural': 'scenes', 'urban': 'scenes', 'male': 'faces', 'female': 'faces'}
+
+
+def build(seed, n_trials=80, **exp_info):
+    return TrialSchedule.build({**DEFAULT_EXP_INFO, **exp_info}, n_trials, N_IMAGES, seed=seed)
+
+
+@pytest.mark.parametrize('block', ['0', 'practice'])
+def test_same_seed_gives_identical_schedule(block):
+    first, second = build(1234, Block=block), build(1234, Block=block)
+    assert first.seed == second.seed == 1234
+    assert first.switch_trials == second.switch_trials
+    for name in TrialSchedule.FIELDS:
+        np.testing.assert_array_equal(getattr(first, name), getattr(second, name), err_msg=name)
+
+
+def test_different_seeds_give_different_schedules():
+    first, second = build(1), build(2)
+    assert any(not np.array_equal(getattr(first, name), getattr(second, name)) for name in TrialSchedule.FIELDS)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_context_flips_only_after_switch_trials(seed):
+    schedule = build(seed)
+    changes = np.flatnonzero(np.diff(schedule.context)) + 1
+    assert changes.tolist() == [trial + 1 for trial in schedule.switch_trials if trial + 1 < len(schedule)]
+    assert set(schedule.context.tolist()) <= {1, 2}
+
+
+def test_validate_schedule_reports_a_misplaced_context_switch():
+    schedule = build(7)
+    assert validate_schedule(schedule, '0') == []
+    first_switch = schedule.switch_trials[0]
+    schedule.context[first_switch + 1:] = 3 - schedule.context[first_switch + 1:]
+    assert any('mapping changes' in problem for problem in validate_schedule(schedule, '0'))
+
+
+def test_validate_schedule_reports_a_long_difficulty_run():
+    schedule = build(7)
+    schedule.difficulty[:10] = 0
+    assert any('difficulty run' in problem for problem in validate_schedule(schedule, '0'))
+
+
+def test_plan_session_schedules_before_pygame_starts(tmp_path, monkeypatch):
+    import pygame
+
+    from hdmtask.session import plan_session
+
+    stimuli = SimpleNamespace(**{f'{kind}_{folder}': [f'{kind}.png'] * N_IMAGES[kind] for kind, folder in IMAGE_FOLDERS.items()})
+    monkeypatch.chdir(tmp_path)
+    schedule = plan_session({**DEFAULT_EXP_INFO, 'Subject': '101'}, stimuli)
+    assert len(schedule) == 80 and validate_schedule(schedule, '0') == []
+    assert not pygame.get_init()
+
+
+@pytest.mark.parametrize('block', ['0', 'practice'])
+@pytest.mark.parametrize('n_trials, seeds', [(80, range(200)), (1000, range(50)), (10000, range(5))])
+def test_difficulty_sequence_keeps_runs_short_and_switch_trials_pinned(block, n_trials, seeds):
+    for seed in seeds:
+        schedule = build(seed, n_trials, Block=block)
+        assert validate_schedule(schedule, block) == [], f"seed {seed}"